@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import os
+import shutil
 from dataclasses import dataclass
 from pathlib import Path
 from typing import BinaryIO, MutableMapping, cast
 
+import streamlit as st
+
 try:
     from helpers import SheetContext
     from db import (
@@ -35,6 +39,7 @@ __all__ = [
 
 
 _TARGET_FILENAME = "answer_sheet.pdf"
+_COPY_CHUNK_SIZE = 1 << 20
 
 
 @dataclass(slots=True)
@@ -45,6 +50,7 @@ class AnswerSheetStatus:
     root_path: str | None
     configured_path: Path | None
     exists_on_disk: bool
+    stat_result: os.stat_result | None = None
 
     @property
     def effective_path(self) -> Path | None:
@@ -66,12 +72,19 @@ def resolve_answer_sheet_status(sheet_context: SheetContext | None) -> AnswerShe
 
     stored_path = get_answer_sheet_path(sheet_context.sheet_id)
     configured_path = Path(stored_path) if stored_path else None
-    exists_on_disk = bool(configured_path and configured_path.exists())
+    # One stat() answers both "does it exist" and "when was it written"
+    stat_result = None
+    if stored_path:
+        try:
+            stat_result = os.stat(stored_path)
+        except OSError:
+            stat_result = None
     return AnswerSheetStatus(
         sheet_id=sheet_context.sheet_id,
         root_path=sheet_context.root_path,
         configured_path=configured_path,
-        exists_on_disk=exists_on_disk,
+        exists_on_disk=stat_result is not None,
+        stat_result=stat_result,
     )
 
 
@@ -83,15 +96,18 @@ def save_uploaded_answer_sheet(
     if not sheet_context or sheet_context.sheet_id is None:
         raise ValueError("Sheet context mit gültiger sheet_id wird benötigt.")
 
-    target_dir = Path(sheet_context.root_path)
-    target_dir.mkdir(parents=True, exist_ok=True)
+    target_dir = os.fspath(sheet_context.root_path)
+    os.makedirs(target_dir, exist_ok=True)
 
     filename = target_name or getattr(uploaded_file, "name", _TARGET_FILENAME) or _TARGET_FILENAME
-    target_path = target_dir / filename
+    target_path = os.path.join(target_dir, filename)
 
-    data = _read_file_bytes(uploaded_file)
-    target_path.write_bytes(data)
-    save_answer_sheet_path(sheet_context.sheet_id, str(target_path))
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    # Copy in fixed-size chunks so the upload is never duplicated in memory
+    with open(target_path, "wb") as target:
+        shutil.copyfileobj(uploaded_file, target, length=_COPY_CHUNK_SIZE)
+    save_answer_sheet_path(sheet_context.sheet_id, target_path)
 
     return resolve_answer_sheet_status(sheet_context)
 
@@ -108,8 +124,6 @@ def delete_answer_sheet(sheet_context: SheetContext) -> AnswerSheetStatus:
 
 
 def render_answer_sheet_sidebar(sheet_context: SheetContext | None) -> AnswerSheetStatus:
-    import streamlit as st  # Imported lazily for easier testing of pure helpers
-
     status = resolve_answer_sheet_status(sheet_context)
     with st.sidebar.expander("Lösungsblatt hinterlegen", expanded=False):
         if not sheet_context:
@@ -150,8 +164,8 @@ def render_answer_sheet_sidebar(sheet_context: SheetContext | None) -> AnswerShe
                     try:
                         updated = save_uploaded_answer_sheet(sheet_context, uploaded_file, _TARGET_FILENAME)
                         st.success("Lösungsblatt gespeichert und verknüpft.")
-                        if updated.configured_path and updated.configured_path.exists():
-                            st.session_state["answer_sheet_saved_at"] = updated.configured_path.stat().st_mtime
+                        if updated.stat_result is not None:
+                            st.session_state["answer_sheet_saved_at"] = updated.stat_result.st_mtime
                         st.rerun()
                     except Exception as error:  # pragma: no cover - user feedback only
                         st.error(f"Fehler beim Speichern des Lösungsblatts: {error}")
@@ -177,8 +191,6 @@ def setup_answer_sheet_toggle(
 ):
     mapping = session_state
     if mapping is None:
-        import streamlit as st  # Imported lazily so tests can supply their own mapping
-
         mapping = cast(MutableMapping[str, bool], st.session_state)
 
     widget_key = f"{key_prefix}_show_answer_sheet_{sheet_id or 'unknown'}"
@@ -190,24 +202,18 @@ def setup_answer_sheet_toggle(
         mapping[widget_key] = default_value
     elif not has_answer_sheet and mapping[widget_key]:
         mapping[widget_key] = False
-        save_grader_state(storage_key, "false")
+        if saved_pref != "false":
+            save_grader_state(storage_key, "false")
 
     def _on_change() -> None:
-        save_grader_state(storage_key, "true" if mapping[widget_key] else "false")
+        value = "true" if mapping[widget_key] else "false"
+        # load_grader_state is cached, so this skips identical writes cheaply
+        if load_grader_state(storage_key) != value:
+            save_grader_state(storage_key, value)
 
     return widget_key, _on_change
 
 
-def _read_file_bytes(uploaded_file: BinaryIO) -> bytes:
-    if hasattr(uploaded_file, "seek"):
-        uploaded_file.seek(0)
-
-    data = uploaded_file.read()
-    if isinstance(data, str):
-        data = data.encode("utf-8")
-    return data
-
-
 def _parse_bool(value: str | None, fallback: bool) -> bool:
     if value is None:
         return fallback
@@ -1,18 +1,25 @@
 """Configuration helpers for runtime paths."""
 from __future__ import annotations
 
+import functools
 import os
 from pathlib import Path
 
 
+@functools.cache
 def _default_data_dir() -> Path:
     """Return the default data directory inside the project."""
     return (Path(__file__).resolve().parent.parent / "data").resolve()
 
 
-def get_data_dir() -> Path:
-    """Return the directory where user-generated data should be stored."""
-    env_value = os.getenv("SIFR_DATA_DIR")
+@functools.cache
+def _resolve_data_dir(env_value: str | None) -> Path:
+    """Resolve the data directory once per distinct ``SIFR_DATA_DIR`` value."""
     if env_value:
         return Path(env_value).expanduser().resolve()
     return _default_data_dir()
+
+
+def get_data_dir() -> Path:
+    """Return the directory where user-generated data should be stored."""
+    return _resolve_data_dir(os.getenv("SIFR_DATA_DIR"))
@@ -1,302 +1,422 @@
+import atexit
 import csv
+import functools
+import itertools
+import json
 import os
+from collections.abc import Iterable
+from contextlib import contextmanager
 from pathlib import Path
+import queue
 import sqlite3
+import threading
 import streamlit as st
+from loguru import logger
 
 from config import get_data_dir
 
+try:  # Allow running inside the app directory or as a package import
+    from helpers import EXERCISE_DIR_PATTERN, SubmissionRecord
+except ImportError:  # pragma: no cover - fallback for package imports
+    from .helpers import EXERCISE_DIR_PATTERN, SubmissionRecord
 
-DB_PATH = get_data_dir() /"db/intern/grading.db"
 
+# Serializes use of the shared connection across Streamlit script threads. Readers take
+# it too: on one connection they would otherwise see another thread's uncommitted rows.
+_WRITE_LOCK = threading.RLock()
 
+# WAL is persisted in the database file; the remaining settings are per connection.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Bump whenever init_db changes the schema so existing databases are migrated.
+_SCHEMA_VERSION = 4
+
+
+@functools.cache
 def _resolve_db_path() -> Path:
-    return Path(DB_PATH)
+    return get_data_dir() / "db/intern/grading.db"
 
 
-def init_db():
-    db_path = _resolve_db_path()
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Table for sheets
-    cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sheets  (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,        -- z.B. "Sheet-Blatt 1"
-                description TEXT,
-                release_date TEXT,                -- ISO date string
-                created_at TEXT DEFAULT (datetime('now'))
-        )
-    ''')
-    
-    # Table for exercises per Sheet
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS exercises (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
-            code TEXT NOT NULL,               -- z.B. "Exercise-1" oder "1.1"
-            title TEXT,
-            max_points REAL NOT NULL DEFAULT 0.0,
-            UNIQUE(sheet_id, code)
+@st.cache_resource(show_spinner=False)
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    """Open the process-wide connection for the given database file once."""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    atexit.register(_close_on_exit, conn)
+    return conn
+
+
+def _close_on_exit(conn: sqlite3.Connection) -> None:
+    """Flush queued writes, refresh planner statistics and close the connection."""
+    flush_grader_state()
+    try:
+        with _WRITE_LOCK:
+            conn.execute("PRAGMA optimize")
+            conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Return the cached connection for the configured database path."""
+    return _open_connection(str(_resolve_db_path()))
+
+
+@contextmanager
+def transaction(immediate: bool = False):
+    """Run the enclosed statements in one transaction on the shared connection.
+
+    Nested use joins the already open transaction instead of starting a new one.
+    ``immediate`` takes the database write lock up front, which bulk writers use
+    so they cannot fail half-way with SQLITE_BUSY when upgrading a read lock.
+    """
+    conn = _get_conn()
+    with _WRITE_LOCK:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            # Also covers a failed COMMIT (e.g. SQLITE_BUSY), which leaves the transaction open
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+
+@contextmanager
+def _reading():
+    """Hold the connection lock while reading, so no other thread's open transaction is visible."""
+    with _WRITE_LOCK:
+        yield _get_conn()
+
+
+# Full schema plus the one-off migrations needed to reach _SCHEMA_VERSION. Every
+# statement is idempotent, so the script can run again on an existing database.
+# init_db wraps it in one transaction together with the user_version stamp.
+_SCHEMA_SQL = '''
+-- Table for sheets
+CREATE TABLE IF NOT EXISTS sheets  (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,        -- z.B. "Sheet-Blatt 1"
+    description TEXT,
+    release_date TEXT,                -- ISO date string
+    created_at TEXT DEFAULT (datetime('now'))
+);
+
+-- Table for exercises per Sheet
+CREATE TABLE IF NOT EXISTS exercises (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    code TEXT NOT NULL,               -- z.B. "Exercise-1" oder "1.1"
+    title TEXT,
+    max_points REAL NOT NULL DEFAULT 0.0,
+    UNIQUE(sheet_id, code)
+);
+
+-- Table for error codes per Sheet
+CREATE TABLE IF NOT EXISTS error_codes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    code TEXT NOT NULL,
+    description TEXT,
+    deduction REAL NOT NULL DEFAULT 0.0,
+    comment TEXT,
+    UNIQUE(sheet_id, code)
+);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    external_id TEXT,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    exercise_id INTEGER REFERENCES exercises(id) ON DELETE SET NULL,
+    group_name TEXT,
+    submitter TEXT,
+    path TEXT,
+    status TEXT NOT NULL DEFAULT 'SUBMITTED',
+    submitted_at TEXT,
+    file_count INTEGER DEFAULT 0,
+    file_hash TEXT,
+    created_at TEXT DEFAULT (datetime('now')),
+    CHECK (status IN ('SUBMITTED', 'PROVISIONAL_MARK', 'FINAL_MARK', 'RESUBMITTED', 'ABSEND', 'SICK'))
+);
+
+-- Table for single files of submissions
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+    filename TEXT NOT NULL,
+    relative_path TEXT,
+    size_bytes INTEGER,
+    mime_type TEXT,
+    uploaded_at TEXT DEFAULT (datetime('now'))
+);
+
+-- Table for feedbacks
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE, -- redundanz für schnelles Filtern
+    exercise_id INTEGER REFERENCES exercises(id) ON DELETE SET NULL,
+    grader TEXT,                 -- wer bewertet hat
+    points REAL,                 -- erreichte Punkte (kann NULL sein, wenn noch offen)
+    markdown_content TEXT,
+    pdf_path TEXT,               -- Pfad zur erzeugten Feedback-PDF
+    created_at TEXT DEFAULT (datetime('now')),
+    updated_at TEXT
+);
+
+-- Table for errors in feedbacks
+CREATE TABLE IF NOT EXISTS feedback_errors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    feedback_id INTEGER NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
+    error_code_id INTEGER NOT NULL REFERENCES error_codes(id) ON DELETE CASCADE,
+    count INTEGER NOT NULL DEFAULT 1,
+    comment TEXT
+);
+
+-- Table for saving history of feedbacks
+CREATE TABLE IF NOT EXISTS feedback_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    feedback_id INTEGER NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
+    grader TEXT,
+    points REAL,
+    markdown_content TEXT,
+    pdf_path TEXT,
+    changed_at TEXT DEFAULT (datetime('now'))
+);
+
+-- Table for saving grader state (which submission is currently being worked on)
+CREATE TABLE IF NOT EXISTS grader_state (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    updated_at TEXT DEFAULT (datetime('now'))
+);
+
+-- Table for saving a path to the answer sheet of a current sheet
+CREATE TABLE IF NOT EXISTS answer_sheets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id),
+    path_to_file TEXT NOT NULL
+);
+
+-- Typed review navigation state; the current submission id used to live in grader_state as text
+CREATE TABLE IF NOT EXISTS review_state (
+    key TEXT PRIMARY KEY,
+    int_value INTEGER,
+    text_value TEXT
+);
+INSERT OR IGNORE INTO review_state (key, int_value)
+    SELECT key, CAST(value AS INTEGER) FROM grader_state
+    WHERE key = 'review_current_submission_id' AND value <> '' AND value NOT GLOB '*[^0-9]*';
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_submissions_sheet_ex ON submissions(sheet_id, exercise_id);
+-- One submission per folder; keep the oldest row if a path was imported twice.
+-- Feedback moves to the surviving row first, otherwise ON DELETE CASCADE would drop it.
+UPDATE OR IGNORE feedback SET submission_id = (
+    SELECT MIN(keep.id) FROM submissions dup JOIN submissions keep ON keep.path = dup.path
+    WHERE dup.id = feedback.submission_id
 )
-    ''')
-    
-    # Table for error codes per Sheet
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS error_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
-            code TEXT NOT NULL,               
-            description TEXT,
-            deduction REAL NOT NULL DEFAULT 0.0,
-            comment TEXT,
-            UNIQUE(sheet_id, code)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS submissions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            external_id TEXT,
-            sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
-            exercise_id INTEGER REFERENCES exercises(id) ON DELETE SET NULL,
-            group_name TEXT,
-            submitter TEXT,
-            path TEXT,
-            status TEXT NOT NULL DEFAULT 'SUBMITTED',
-            submitted_at TEXT,
-            file_count INTEGER DEFAULT 0,
-            file_hash TEXT,
-            created_at TEXT DEFAULT (datetime('now')),
-            CHECK (status IN ('SUBMITTED', 'PROVISIONAL_MARK', 'FINAL_MARK', 'RESUBMITTED', 'ABSEND', 'SICK'))
-        )    
-    ''')
-
-    # Table for single files of submissions
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            submission_id INTEGER NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
-            filename TEXT NOT NULL,
-            relative_path TEXT,     
-            size_bytes INTEGER,
-            mime_type TEXT,
-            uploaded_at TEXT DEFAULT (datetime('now'))
-        )
-    ''')
-
-    # Table for feedbacks
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            submission_id INTEGER NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
-            sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE, -- redundanz für schnelles Filtern
-            exercise_id INTEGER REFERENCES exercises(id) ON DELETE SET NULL,
-            grader TEXT,                 -- wer bewertet hat
-            points REAL,                 -- erreichte Punkte (kann NULL sein, wenn noch offen)
-            markdown_content TEXT,
-            pdf_path TEXT,               -- Pfad zur erzeugten Feedback-PDF
-            created_at TEXT DEFAULT (datetime('now')),
-            updated_at TEXT
-        )
-    ''')
-
-    # Table for errors in feedbacks
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS feedback_errors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            feedback_id INTEGER NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
-            error_code_id INTEGER NOT NULL REFERENCES error_codes(id) ON DELETE CASCADE,
-            count INTEGER NOT NULL DEFAULT 1,
-            comment TEXT
-        )
-    ''')
-
-    # Table for saving history of feedbacks
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS feedback_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            feedback_id INTEGER NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
-            grader TEXT,
-            points REAL,
-            markdown_content TEXT,
-            pdf_path TEXT,
-            changed_at TEXT DEFAULT (datetime('now'))
-        )
-    ''')
-
-    # Table for saving grader state (which submission is currently being worked on)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS grader_state (
-            key TEXT PRIMARY KEY,
-            value TEXT,
-            updated_at TEXT DEFAULT (datetime('now'))
-        )
-    ''')
-
-    # Table for saving a path to the answer sheet of a current sheet
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS answer_sheets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sheet_id INTEGER NOT NULL REFERENCES sheets(id),
-            path_to_file TEXT NOT NULL
-        )
-    ''')
+WHERE submission_id IN (SELECT id FROM submissions WHERE path IS NOT NULL AND id NOT IN (SELECT MIN(id) FROM submissions WHERE path IS NOT NULL GROUP BY path));
+DELETE FROM submissions WHERE path IS NOT NULL AND id NOT IN (SELECT MIN(id) FROM submissions WHERE path IS NOT NULL GROUP BY path);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_submissions_path ON submissions(path);
+CREATE INDEX IF NOT EXISTS idx_files_submission ON files(submission_id);
+-- One feedback row per submission; drop stray duplicates before enforcing it
+DROP INDEX IF EXISTS idx_feedback_submission;
+DELETE FROM feedback WHERE id NOT IN (SELECT MAX(id) FROM feedback GROUP BY submission_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_feedback_submission_unique ON feedback(submission_id);
+CREATE INDEX IF NOT EXISTS idx_error_codes_sheet ON error_codes(sheet_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_answer_sheets_sheet_id ON answer_sheets(sheet_id);
+-- Child keys of feedback; without them every feedback/error code delete scans feedback_errors
+CREATE INDEX IF NOT EXISTS idx_feedback_errors_feedback ON feedback_errors(feedback_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_errors_error ON feedback_errors(error_code_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_sheet_ex ON feedback(sheet_id, exercise_id);
+-- Covers the columns get_submissions reads so exercise-scoped lookups stay index-only
+CREATE INDEX IF NOT EXISTS idx_submissions_ex ON submissions(exercise_id, id, status, path, group_name, submitter);
+ANALYZE;
+'''
 
-    # Indexes 
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_submissions_sheet_ex ON submissions(sheet_id, exercise_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_submission ON files(submission_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_feedback_submission ON feedback(submission_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_error_codes_sheet ON error_codes(sheet_id)")
-    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_answer_sheets_sheet_id ON answer_sheets(sheet_id)")
 
-    conn.commit()
-    conn.close()
+def init_db():
+    with _reading() as conn:
+        cursor = conn.cursor()
+        # Schema is already current; skip re-running the DDL on every app start
+        if cursor.execute('PRAGMA user_version').fetchone()[0] == _SCHEMA_VERSION:
+            return
+
+        # executescript commits any open transaction before it starts, so the BEGIN has to be
+        # part of the script; a failing statement must not leave it open on the shared connection
+        try:
+            conn.executescript(
+                f"BEGIN IMMEDIATE;\n{_SCHEMA_SQL}\nPRAGMA user_version = {_SCHEMA_VERSION};\nCOMMIT;"
+            )
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
 
 def load_names_from_csv(csv_path):
-    names = {}
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f, delimiter=',', fieldnames=['submissionid', 'group', 'sheet', 'exercise', 'points', 'status'])
-        next(reader)  # Skip the header line with #
-        for row in reader:
-            submissionid = row['submissionid']
-            group = row['group']
-            names[submissionid] = group
-    return names
+    # Columns: submissionid, group, sheet, exercise, points, status
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f, delimiter=',')
+        next(reader, None)  # Skip the header line with #
+        return {row[0]: row[1] for row in reader if row}
 
 def scan_and_insert_submissions(root_dir):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    
-    # Get sheet_id from root_dir name
-    sheet_name = os.path.basename(root_dir)
-    cursor.execute('SELECT id FROM sheets WHERE name = ?', (sheet_name,))
-    sheet_row = cursor.fetchone()
-    if not sheet_row:
-        cursor.execute('INSERT INTO sheets (name) VALUES (?)', (sheet_name,))
-        sheet_id = cursor.lastrowid
-    else:
-        sheet_id = sheet_row[0]
-    
-    # Pre-fetch all relevant data to avoid N+1 queries
-    # 1. Exercises
-    cursor.execute('SELECT code, id FROM exercises WHERE sheet_id = ?', (sheet_id,))
-    exercise_map = {row[0]: row[1] for row in cursor.fetchall()} # code -> id
-    
-    # 2. Existing Submissions
-    cursor.execute('SELECT path, id, status, group_name, submitter, exercise_id FROM submissions WHERE sheet_id = ?', (sheet_id,))
-    # map path -> dict of details
-    existing_submissions = {
-        row[0]: {
-            'id': row[1], 'status': row[2], 'group_name': row[3], 
-            'submitter': row[4], 'exercise_id': row[5]
-        } 
-        for row in cursor.fetchall()
-    }
-    
-    csv_path = os.path.join(root_dir, 'marks.csv')
-    names = load_names_from_csv(csv_path) if os.path.exists(csv_path) else {}
-    
-    discovered_paths = set()
-    to_insert_exercises = []
-    to_insert_submissions = [] # list of tuples
-    to_update_submissions = [] # list of tuples
-    
-    # We might find new exercises, track them to avoid dupes in this run
-    new_exercises_cache = {}
-
-    for exercise_dir in os.listdir(root_dir):
-        exercise_path = os.path.join(root_dir, exercise_dir)
-        if not os.path.isdir(exercise_path):
-            continue
-            
-        # Check if it looks like an exercise
-        lower_name = exercise_dir.lower()
-        if not (lower_name.startswith('excercise-') or lower_name.startswith('exercise-')):
-             continue
-
-        exercise_code = exercise_dir
+    with transaction(immediate=True) as conn:
+        cursor = conn.cursor()
         
-        # Resolve Exercise ID
-        if exercise_code in exercise_map:
-            exercise_id = exercise_map[exercise_code]
-        elif exercise_code in new_exercises_cache:
-            exercise_id = new_exercises_cache[exercise_code]
+        # Get sheet_id from root_dir name
+        sheet_name = os.path.basename(root_dir)
+        cursor.execute('SELECT id FROM sheets WHERE name = ?', (sheet_name,))
+        sheet_row = cursor.fetchone()
+        if not sheet_row:
+            cursor.execute('INSERT INTO sheets (name) VALUES (?) RETURNING id', (sheet_name,))
+            sheet_id = cursor.fetchone()[0]
         else:
-            # Create new exercise immediately to get ID (simplest for now, usually few exercises)
-            cursor.execute('INSERT INTO exercises (sheet_id, code) VALUES (?, ?)', (sheet_id, exercise_code))
-            exercise_id = cursor.lastrowid
-            exercise_map[exercise_code] = exercise_id
-            new_exercises_cache[exercise_code] = exercise_id
-
-        for submission_dir in os.listdir(exercise_path):
-            submission_path = os.path.join(exercise_path, submission_dir)
-            if not os.path.isdir(submission_path):
-                continue
+            sheet_id = sheet_row[0]
+        
+        # Pre-fetch all relevant data to avoid N+1 queries
+        # 1. Exercises
+        cursor.execute('SELECT code, id FROM exercises WHERE sheet_id = ?', (sheet_id,))
+        exercise_map = dict(cursor.fetchall()) # code -> id
+        
+        # 2. Existing Submissions
+        cursor.execute('SELECT path, id, status, group_name, submitter, exercise_id FROM submissions WHERE sheet_id = ?', (sheet_id,))
+        # map path -> dict of details
+        existing_submissions = {
+            row[0]: {
+                'id': row[1], 'status': row[2], 'group_name': row[3], 
+                'submitter': row[4], 'exercise_id': row[5]
+            } 
+            for row in cursor.fetchall()
+        }
+        
+        csv_path = os.path.join(root_dir, 'marks.csv')
+        try:
+            names = load_names_from_csv(csv_path)
+        except FileNotFoundError:
+            names = {}
+        
+        discovered_paths = set()
+        to_upsert_submissions = [] # list of tuples
+        new_paths_by_key = {} # (exercise_id, submission number) -> path of a folder seen for the first time
+
+        # scandir entries carry the d_type from readdir, so is_dir() needs no extra stat
+        with os.scandir(root_dir) as it:
+            exercise_entries = [
+                entry for entry in it
+                if EXERCISE_DIR_PATTERN.match(entry.name) and entry.is_dir()
+            ]
+
+        walked_exercises = [] # (exercise_code, submission entries)
+        for exercise_entry in exercise_entries:
+            with os.scandir(exercise_entry.path) as it:
+                walked_exercises.append((exercise_entry.name, [entry for entry in it if entry.is_dir()]))
+
+        # Create all unknown exercises in one statement; RETURNING hands back their ids
+        new_exercises = [code for code, _ in walked_exercises if code not in exercise_map]
+        if new_exercises:
+            cursor.execute(
+                'INSERT INTO exercises (sheet_id, code) SELECT ?, value FROM json_each(?) RETURNING code, id',
+                (sheet_id, json.dumps(new_exercises)),
+            )
+            exercise_map.update(cursor.fetchall())
+
+        for exercise_code, submission_entries in walked_exercises:
+            exercise_id = exercise_map[exercise_code]
+
+            for submission_entry in submission_entries:
+                submission_dir = submission_entry.name
+                submission_path = submission_entry.path
+
+                # Extract submission details
+                parts = submission_dir.split('_')
+                submissionid = parts[-1] if parts else submission_dir
+                submitter = names.get(submissionid, submission_dir)
+                group_name = submission_dir
                 
-            # Extract submission details
-            parts = submission_dir.split('_')
-            submissionid = parts[-1] if parts else submission_dir
-            submitter = names.get(submissionid, submission_dir)
-            group_name = submission_dir
-            
-            discovered_paths.add(submission_path)
-            
-            if submission_path in existing_submissions:
-                # Check if update needed? For now we update just in case metadata changed
-                # (except status, which we preserve unless it's missing)
-                existing = existing_submissions[submission_path]
-                current_status = existing['status']
+                discovered_paths.add(submission_path)
                 
-                # Update if critical fields differ
-                if (existing['group_name'] != group_name or 
+                existing = existing_submissions.get(submission_path)
+                if existing is None:
+                    new_paths_by_key[(exercise_id, submissionid)] = submission_path
+                # Unchanged rows are skipped; new and changed ones go through the upsert
+                if (existing is None or
+                    existing['group_name'] != group_name or 
                     existing['submitter'] != submitter or 
                     existing['exercise_id'] != exercise_id):
                     
-                    to_update_submissions.append((
-                        group_name, submitter, sheet_id, exercise_id, current_status, submission_path
+                    to_upsert_submissions.append((
+                        submission_path, group_name, submitter, sheet_id, exercise_id, 'SUBMITTED'
                     ))
-            else:
-                # New submission
-                to_insert_submissions.append((
-                    submission_path, group_name, submitter, sheet_id, exercise_id, 'SUBMITTED'
-                ))
-
-    # Batch Execution
-    if to_insert_submissions:
-        cursor.executemany(
-            '''INSERT INTO submissions (path, group_name, submitter, sheet_id, exercise_id, status)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            to_insert_submissions
-        )
-        
-    if to_update_submissions:
-        cursor.executemany(
-            '''UPDATE submissions SET
-               group_name = ?, submitter = ?, sheet_id = ?, exercise_id = ?, status = ?
-               WHERE path = ?''',
-            to_update_submissions
-        )
 
-    # Remove submissions that no longer exist on disk
-    obsolete_paths = set(existing_submissions.keys()) - discovered_paths
-    if obsolete_paths:
-        cursor.executemany('DELETE FROM submissions WHERE path = ?', [(path,) for path in obsolete_paths])
-    
-    conn.commit()
-    conn.close()
-    
+        # Batch Execution; an existing row keeps its grading status
+        if to_upsert_submissions:
+            cursor.executemany(
+                '''INSERT INTO submissions (path, group_name, submitter, sheet_id, exercise_id, status)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(path) DO UPDATE SET
+                       group_name = excluded.group_name,
+                       submitter = excluded.submitter,
+                       sheet_id = excluded.sheet_id,
+                       exercise_id = excluded.exercise_id''',
+                to_upsert_submissions
+            )
+
+        # Remove submissions that no longer exist on disk
+        obsolete_paths = set(existing_submissions.keys()) - discovered_paths
+        if obsolete_paths:
+            # A renamed or moved folder (same exercise and submission number) keeps its grading
+            renamed = []
+            for path in obsolete_paths:
+                old = existing_submissions[path]
+                key = (old['exercise_id'], old['group_name'].split('_')[-1])
+                new_path = new_paths_by_key.pop(key, None)
+                if new_path is not None:
+                    renamed.append((old['id'], new_path, old['status']))
+            if renamed:
+                cursor.executemany(
+                    'UPDATE submissions SET status = ? WHERE path = ?',
+                    [(status, new_path) for _, new_path, status in renamed],
+                )
+                cursor.executemany(
+                    'UPDATE feedback SET submission_id = (SELECT id FROM submissions WHERE path = ?) WHERE submission_id = ?',
+                    [(new_path, old_id) for old_id, new_path, _ in renamed],
+                )
+
+            # Deleting cascades to feedback, error codes and history, so graded rows without
+            # a successor are kept; their folder is simply reported missing by the pages
+            cursor.execute(
+                '''DELETE FROM submissions
+                   WHERE path IN (SELECT value FROM json_each(?))
+                     AND id NOT IN (SELECT submission_id FROM feedback)''',
+                (json.dumps(list(obsolete_paths)),),
+            )
+
     # Invalidate caches
     get_submissions.clear()
+    get_submission_records.clear()
+    get_feedback_submission_ids.clear()
+    get_review_submission_ids.clear()
+    get_submission_exercise_codes.clear()
     get_sheets.clear()
+    get_sheet_id_by_name.clear()
     get_exercise_max_points.clear()
 
-@st.cache_data
-def get_submissions(exercise_code: str | None = None):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
+def _execute_submissions_query(cursor: sqlite3.Cursor, exercise_code: str | None) -> sqlite3.Cursor:
     query = '''
         SELECT s.id, s.path, s.group_name, s.submitter, e.code, s.status
         FROM submissions s
@@ -308,37 +428,89 @@ def get_submissions(exercise_code: str | None = None):
         params = (exercise_code,)
     query += ' ORDER BY s.id'
     cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    return cursor
+
+def _iter_submissions(conn: sqlite3.Connection, exercise_code: str | None):
+    """Yield submission rows in id order, fetched in batches; the caller holds the lock."""
+    cursor = _execute_submissions_query(conn.cursor(), exercise_code)
+    while True:
+        batch = cursor.fetchmany(4096)
+        if not batch:
+            break
+        yield from batch
+
+@st.cache_data
+def get_submissions(exercise_code: str | None = None):
+    # Consumed completely while the lock is held, so it is released right after
+    with _reading() as conn:
+        return list(_iter_submissions(conn, exercise_code))
+
+@st.cache_data
+def get_submission_exercise_codes() -> list[str]:
+    """Return the sorted codes of exercises that have at least one submission."""
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT e.code
+            FROM exercises e
+            JOIN submissions s ON s.exercise_id = e.id
+            ORDER BY e.code
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+
+def _submission_record_factory(cursor, row):
+    return SubmissionRecord(*row)
+
+@st.cache_data
+def get_submission_records(exercise_code: str | None = None) -> list[SubmissionRecord]:
+    """Like get_submissions, but rows are built as SubmissionRecord while fetching."""
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = _submission_record_factory
+        return _execute_submissions_query(cursor, exercise_code).fetchall()
 
 def get_feedback(submission_id):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('SELECT points, markdown_content FROM feedback WHERE submission_id = ?', (submission_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return row
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT points, markdown_content FROM feedback WHERE submission_id = ?', (submission_id,))
+        row = cursor.fetchone()
+        return row
 
 
+@st.cache_data(show_spinner=False)
 def get_feedback_submission_ids() -> set[int]:
     """Return all submission IDs that already have feedback entries."""
 
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('SELECT DISTINCT submission_id FROM feedback')
-    rows = cursor.fetchall()
-    conn.close()
-    return {row[0] for row in rows}
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT submission_id FROM feedback')
+        rows = cursor.fetchall()
+        return {row[0] for row in rows}
 
 
+@st.cache_data(show_spinner=False)
 def get_answer_sheet_path(sheet_id: int) -> str | None:
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('SELECT path_to_file FROM answer_sheets WHERE sheet_id = ?', (sheet_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else None
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT path_to_file FROM answer_sheets WHERE sheet_id = ?', (sheet_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+# Feedback rows take sheet/exercise from their submission; an existing row is updated in
+# place so the feedback id (and rows referencing it) stays stable.
+_FEEDBACK_UPSERT_SQL = '''
+    INSERT INTO feedback (submission_id, sheet_id, exercise_id, points, markdown_content, pdf_path)
+    SELECT s.id, s.sheet_id, s.exercise_id, ?, ?, ?
+    FROM submissions s
+    WHERE s.id = ?
+    ON CONFLICT(submission_id) DO UPDATE SET
+        sheet_id = excluded.sheet_id,
+        exercise_id = excluded.exercise_id,
+        points = excluded.points,
+        markdown_content = excluded.markdown_content,
+        pdf_path = excluded.pdf_path,
+        updated_at = datetime('now')
+'''
 
 def save_feedback_with_submission(
     submission_id: int,
@@ -349,209 +521,253 @@ def save_feedback_with_submission(
 ):
     """Persist feedback data and synchronize submission status in one transaction."""
 
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-
-    cursor.execute('SELECT sheet_id, exercise_id FROM submissions WHERE id = ?', (submission_id,))
-    submission_data = cursor.fetchone()
-    if not submission_data:
-        conn.close()
-        raise ValueError(f"Submission with id {submission_id} not found")
-
-    sheet_id, exercise_id = submission_data
-
-    cursor.execute('SELECT id FROM feedback WHERE submission_id = ?', (submission_id,))
-    feedback_exists = cursor.fetchone() is not None
+    with transaction() as conn:
+        cursor = conn.cursor()
 
-    if feedback_exists:
+        # No row returned means there is no such submission
         cursor.execute(
-            '''
-            UPDATE feedback
-            SET sheet_id = ?,
-                exercise_id = ?,
-                points = ?,
-                markdown_content = ?,
-                pdf_path = ?,
-                updated_at = datetime('now')
-            WHERE submission_id = ?
-            ''',
-            (sheet_id, exercise_id, points, markdown_content, pdf_path, submission_id),
+            _FEEDBACK_UPSERT_SQL + ' RETURNING 1',
+            (points, markdown_content, pdf_path, submission_id),
         )
-    else:
+        if cursor.fetchone() is None:
+            raise ValueError(f"Submission with id {submission_id} not found")
+
         cursor.execute(
             '''
-            INSERT INTO feedback (submission_id, sheet_id, exercise_id, points, markdown_content, pdf_path)
-            VALUES (?, ?, ?, ?, ?, ?)
+            UPDATE submissions
+            SET status = ?
+            WHERE id = ?
             ''',
-            (submission_id, sheet_id, exercise_id, points, markdown_content, pdf_path),
+            (status, submission_id),
         )
 
-    cursor.execute(
-        '''
-        UPDATE submissions
-        SET status = ?
-        WHERE id = ?
-        ''',
-        (status, submission_id),
-    )
-
-    conn.commit()
-    conn.close()
-    
     # Invalidate
     get_submissions.clear()
+    get_submission_records.clear()
+    get_feedback_submission_ids.clear()
 
 def save_answer_sheet_path(sheet_id: int, file_path: str) -> None:
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute(
-        '''
-        INSERT INTO answer_sheets (sheet_id, path_to_file)
-        VALUES (?, ?)
-        ON CONFLICT(sheet_id) DO UPDATE SET path_to_file = excluded.path_to_file
-        ''',
-        (sheet_id, file_path),
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''
+            INSERT INTO answer_sheets (sheet_id, path_to_file)
+            VALUES (?, ?)
+            ON CONFLICT(sheet_id) DO UPDATE SET path_to_file = excluded.path_to_file
+            ''',
+            (sheet_id, file_path),
+        )
+
+    get_answer_sheet_path.clear()
 
 
 def delete_answer_sheet_path(sheet_id: int) -> None:
     """Remove the stored answer sheet entry for the given sheet."""
 
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute(
-        'DELETE FROM answer_sheets WHERE sheet_id = ?',
-        (sheet_id,),
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'DELETE FROM answer_sheets WHERE sheet_id = ?',
+            (sheet_id,),
+        )
+
+    get_answer_sheet_path.clear()
 
 @st.cache_data
 def get_sheets():
     """Return all stored sheets ordered by name."""
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, name FROM sheets ORDER BY name COLLATE NOCASE')
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, name FROM sheets ORDER BY name COLLATE NOCASE')
+        rows = cursor.fetchall()
+        return rows
 
 
+@st.cache_data(show_spinner=False)
 def get_sheet_id_by_name(sheet_name: str) -> int | None:
     """Return the sheet id for the given name, or None if it does not exist."""
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('SELECT id FROM sheets WHERE name = ?', (sheet_name,))
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else None
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM sheets WHERE name = ?', (sheet_name,))
+        row = cursor.fetchone()
+        return row[0] if row else None
 
 
 @st.cache_data
 def get_error_codes(sheet_id: int | None = None):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    if sheet_id is None:
-        cursor.execute('SELECT id, code, description, deduction, comment FROM error_codes ORDER BY code COLLATE NOCASE')
-    else:
-        cursor.execute(
-            'SELECT id, code, description, deduction, comment FROM error_codes WHERE sheet_id = ? ORDER BY code COLLATE NOCASE',
-            (sheet_id,)
-        )
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    with _reading() as conn:
+        cursor = conn.cursor()
+        if sheet_id is None:
+            cursor.execute('SELECT id, code, description, deduction, comment FROM error_codes ORDER BY code COLLATE NOCASE')
+        else:
+            cursor.execute(
+                'SELECT id, code, description, deduction, comment FROM error_codes WHERE sheet_id = ? ORDER BY code COLLATE NOCASE',
+                (sheet_id,)
+            )
+        rows = cursor.fetchall()
+        return rows
 
 @st.cache_data
-def get_exercise_max_points():
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('SELECT code, max_points FROM exercises')
-    rows = cursor.fetchall()
-    conn.close()
-    return {row[0]: row[1] for row in rows}
-
-def save_exercise_max_points(exercise, max_points):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    # Update max_points in exercises table (exercise code is stored in 'code' column)
-    cursor.execute('UPDATE exercises SET max_points = ? WHERE code = ?',
-                   (max_points, exercise))
-    conn.commit()
-    conn.close()
+def get_exercise_max_points(sheet_id: int):
+    """Max points per exercise code of one sheet; codes repeat across sheets."""
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT code, max_points FROM exercises WHERE sheet_id = ? ORDER BY code COLLATE NOCASE',
+            (sheet_id,),
+        )
+        rows = cursor.fetchall()
+        return {row[0]: row[1] for row in rows}
+
+def save_exercise_max_points(exercise, max_points, sheet_id: int | None = None):
+    with transaction() as conn:
+        cursor = conn.cursor()
+        if sheet_id is None:
+            # Update max_points in exercises table (exercise code is stored in 'code' column)
+            cursor.execute('UPDATE exercises SET max_points = ? WHERE code = ?',
+                           (max_points, exercise))
+        else:
+            # Single row addressed through UNIQUE(sheet_id, code)
+            cursor.execute(
+                '''
+                INSERT INTO exercises (sheet_id, code, max_points)
+                VALUES (?, ?, ?)
+                ON CONFLICT(sheet_id, code) DO UPDATE SET max_points = excluded.max_points
+                ''',
+                (sheet_id, exercise, max_points),
+            )
     get_exercise_max_points.clear()
 
 def add_error_code(sheet_id, code, description, deduction, comment):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO error_codes (sheet_id, code, description, deduction, comment) VALUES (?, ?, ?, ?, ?)',
-        (sheet_id, code, description, deduction, comment)
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO error_codes (sheet_id, code, description, deduction, comment) VALUES (?, ?, ?, ?, ?)',
+            (sheet_id, code, description, deduction, comment)
+        )
     get_error_codes.clear()
 
 def delete_error_code(code, sheet_id: int | None = None):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    if sheet_id is None:
-        cursor.execute('DELETE FROM error_codes WHERE code = ?', (code,))
-    else:
-        cursor.execute('DELETE FROM error_codes WHERE code = ? AND sheet_id = ?', (code, sheet_id))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        if sheet_id is None:
+            cursor.execute('DELETE FROM error_codes WHERE code = ?', (code,))
+        else:
+            cursor.execute('DELETE FROM error_codes WHERE code = ? AND sheet_id = ?', (code, sheet_id))
     get_error_codes.clear()
 
 def delete_error_code_by_id(error_code_id):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM error_codes WHERE id = ?', (error_code_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM error_codes WHERE id = ?', (error_code_id,))
     get_error_codes.clear()
 
 def update_error_code(error_code_id, code, description, deduction, comment):
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute(
-        '''
-        UPDATE error_codes
-        SET code = ?, description = ?, deduction = ?, comment = ?
-        WHERE id = ?
-        ''',
-        (code, description, deduction, comment, error_code_id)
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''
+            UPDATE error_codes
+            SET code = ?, description = ?, deduction = ?, comment = ?
+            WHERE id = ?
+            ''',
+            (code, description, deduction, comment, error_code_id)
+        )
     get_error_codes.clear()
 
+# grader_state only holds UI preferences, so writes are handed to a background
+# thread instead of blocking widget callbacks on the commit. Values stay visible
+# through _PENDING_GRADER_STATE until the writer has persisted them; whatever is
+# still queued when the process is killed hard is lost.
+_DELETED = object()
+_GRADER_STATE_QUEUE: queue.Queue = queue.Queue()
+_PENDING_GRADER_STATE: dict = {}
+_PENDING_LOCK = threading.Lock()
+_WRITE_SEQUENCE = itertools.count()
+_writer_thread: threading.Thread | None = None
+
+
+def _grader_state_writer(work_queue: queue.Queue) -> None:
+    # The queue is passed in so a reloaded module's new queue is never mixed up with this one
+    while True:
+        seq, key, value = work_queue.get()
+        written = False
+        try:
+            with transaction() as conn:
+                if value is _DELETED:
+                    conn.execute('DELETE FROM grader_state WHERE key = ?', (key,))
+                else:
+                    conn.execute(
+                        '''
+                        INSERT INTO grader_state (key, value) VALUES (?, ?)
+                        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = datetime('now')
+                        ''',
+                        (key, value),
+                    )
+            _read_grader_state.clear()
+            written = True
+        except Exception:
+            # Anything escaping here would end the thread and leave flush_grader_state waiting forever
+            logger.exception("grader_state konnte nicht gespeichert werden: {}", key)
+        finally:
+            with _PENDING_LOCK:
+                # A newer write for the same key keeps its pending value; a failed write
+                # keeps this one, so the session still reads what the user chose
+                if written and _PENDING_GRADER_STATE.get(key, (None,))[0] == seq:
+                    del _PENDING_GRADER_STATE[key]
+            work_queue.task_done()
+
+
+def _enqueue_grader_state(key, value) -> None:
+    global _writer_thread
+    seq = next(_WRITE_SEQUENCE)
+    with _PENDING_LOCK:
+        _PENDING_GRADER_STATE[key] = (seq, value)
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(
+                target=_grader_state_writer,
+                args=(_GRADER_STATE_QUEUE,),
+                name="grader-state-writer",
+                daemon=True,
+            )
+            _writer_thread.start()
+    _GRADER_STATE_QUEUE.put((seq, key, value))
+
+
+def flush_grader_state() -> None:
+    """Block until all queued grader_state writes have been committed."""
+    if _writer_thread is not None:
+        _GRADER_STATE_QUEUE.join()
+
+
+atexit.register(flush_grader_state)
+
+
 def save_grader_state(key, value):
     """Save a key-value pair in the grader_state table."""
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('INSERT OR REPLACE INTO grader_state (key, value) VALUES (?, ?)', (key, value))
-    conn.commit()
-    conn.close()
+    _enqueue_grader_state(key, value)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _read_grader_state(key):
+    with _reading() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT value FROM grader_state WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
 
 def load_grader_state(key, default=None):
     """Load a value from the grader_state table by key."""
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('SELECT value FROM grader_state WHERE key = ?', (key,))
-    row = cursor.fetchone()
-    conn.close()
-    return row[0] if row else default
+    with _PENDING_LOCK:
+        pending = _PENDING_GRADER_STATE.get(key)
+    if pending is not None:
+        value = pending[1]
+        return default if value is _DELETED else value
+    value = _read_grader_state(key)
+    return default if value is None else value
 
 def delete_grader_state(key):
     """Delete a key-value pair from the grader_state table."""
-    conn = sqlite3.connect(_resolve_db_path())
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM grader_state WHERE key = ?', (key,))
-    conn.commit()
-    conn.close()
+    _enqueue_grader_state(key, _DELETED)
 
 
 _REVIEW_CURRENT_SUBMISSION_KEY = "review_current_submission_id"
@@ -559,23 +775,37 @@ _REVIEW_CURRENT_SUBMISSION_KEY = "review_current_submission_id"
 
 def get_review_current_submission_id(default: int | None = None) -> int | None:
     """Return the currently stored submission id for the review page."""
-    value = load_grader_state(_REVIEW_CURRENT_SUBMISSION_KEY)
-    if value is None:
-        return default
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return default
+    with _reading() as conn:
+        row = conn.execute(
+            'SELECT int_value FROM review_state WHERE key = ?', (_REVIEW_CURRENT_SUBMISSION_KEY,)
+        ).fetchone()
+    return row[0] if row and row[0] is not None else default
 
 
 def set_review_current_submission_id(submission_id: int) -> None:
     """Persist the given submission id for the review page."""
-    save_grader_state(_REVIEW_CURRENT_SUBMISSION_KEY, str(int(submission_id)))
+    with transaction() as conn:
+        conn.execute(
+            '''
+            INSERT INTO review_state (key, int_value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET int_value = excluded.int_value
+            ''',
+            (_REVIEW_CURRENT_SUBMISSION_KEY, int(submission_id)),
+        )
 
 
+@st.cache_data(show_spinner=False)
 def get_review_submission_ids(exercise_code: str | None = None) -> list[int]:
     """Return ordered submission ids matching the optional exercise filter."""
-    return [row[0] for row in get_submissions(exercise_code)]
+    # Same filter and order as get_submissions, but only the ids (index-only on idx_submissions_ex)
+    query = 'SELECT s.id FROM submissions s JOIN exercises e ON s.exercise_id = e.id'
+    params: tuple = ()
+    if exercise_code:
+        query += ' WHERE e.code = ?'
+        params = (exercise_code,)
+    query += ' ORDER BY s.id'
+    with _reading() as conn:
+        return [row[0] for row in conn.execute(query, params)]
 
 
 def step_review_current_submission(step: int, exercise_code: str | None = None) -> int:
@@ -594,9 +824,9 @@ def step_review_current_submission(step: int, exercise_code: str | None = None)
         step_value = 0
 
     saved_id = get_review_current_submission_id()
-    if saved_id in ids:
+    try:
         current_index = ids.index(saved_id)
-    else:
+    except ValueError:
         current_index = 0 if step_value >= 0 else len(ids) - 1
 
     new_index = current_index + step_value
@@ -614,12 +844,18 @@ def step_review_current_submission(step: int, exercise_code: str | None = None)
 # Navigation Helper Functions for Streamlit Apps
 # ============================================================================
 
-def navigate_submissions(submissions_list: list, exercise_filter: str | None = None) -> tuple[list, dict, dict]:
+# Status "FINAL_MARK" oder "PROVISIONAL_MARK" bedeutet korrigiert
+_CHECKED_STATUSES = frozenset(('FINAL_MARK', 'PROVISIONAL_MARK'))
+_CHECKED_PREFIX = "✅"
+_OPEN_PREFIX = "⭕"
+
+
+def navigate_submissions(submissions_list: Iterable, exercise_filter: str | None = None) -> tuple[list, dict, dict]:
     """
     Build navigation maps for submissions.
     
     Args:
-        submissions_list: List of submission rows from get_submissions()
+        submissions_list: Submission rows from get_submissions()
         exercise_filter: Optional exercise code to filter by
         
     Returns:
@@ -628,23 +864,16 @@ def navigate_submissions(submissions_list: list, exercise_filter: str | None = N
     # Filter submissions
     filtered = submissions_list
     if exercise_filter and exercise_filter != "Alle":
-        filtered = [row for row in submissions_list if row[4] == exercise_filter]
+        filtered = (row for row in submissions_list if row[4] == exercise_filter)
     
     # Build maps
-    id_to_label_map = {}
-    label_to_id_map = {}
-    submission_ids_ordered = []
-    
-    for row in filtered:
-        submission_id = row[0]
-        # row[3] is submitter name, row[4] is exercise_code, row[5] is status
-        # Status "FINAL_MARK" oder "PROVISIONAL_MARK" bedeutet korrigiert
-        status_flag = "✅" if row[5] in ['FINAL_MARK', 'PROVISIONAL_MARK'] else "⭕"
-        label = f"{status_flag} {row[3]} ({row[4]})"
-        
-        id_to_label_map[submission_id] = label
-        label_to_id_map[label] = submission_id
-        submission_ids_ordered.append(submission_id)
+    # row[3] is submitter name, row[4] is exercise_code, row[5] is status
+    id_to_label_map = {
+        row[0]: f"{_CHECKED_PREFIX if row[5] in _CHECKED_STATUSES else _OPEN_PREFIX} {row[3]} ({row[4]})"
+        for row in filtered
+    }
+    submission_ids_ordered = list(id_to_label_map)
+    label_to_id_map = {label: submission_id for submission_id, label in id_to_label_map.items()}
     
     return submission_ids_ordered, id_to_label_map, label_to_id_map
 
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
-from typing import Callable, Iterable, Sequence
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Mapping, Sequence
+
+
+# Exercise folders are named "Exercise-<n>" (or the legacy misspelling "Excercise-<n>")
+EXERCISE_DIR_PATTERN = re.compile(r"(?:excercise|exercise)-", re.IGNORECASE)
 
 
 @dataclass(slots=True)
@@ -24,6 +29,13 @@ class SubmissionRecord:
     submitter: str
     exercise_code: str
     status: str
+    # Lowercased once so search and sorting do not re-lower on every rerun
+    submitter_lc: str = field(init=False, repr=False, compare=False)
+    group_name_lc: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.submitter_lc = (self.submitter or "").lower()
+        self.group_name_lc = (self.group_name or "").lower()
 
     @classmethod
     def from_row(cls, row: Sequence):
@@ -67,6 +79,7 @@ class ErrorCode:
 
 
 def convert_submissions(rows: Iterable[Sequence]) -> list[SubmissionRecord]:
+    """Deprecated: prefer ``db.get_submission_records``, which builds records while fetching."""
     return [SubmissionRecord.from_row(row) for row in rows]
 
 
@@ -82,21 +95,40 @@ def resolve_sheet_context(
     return SheetContext(root_path=current_root, sheet_name=sheet_name, sheet_id=sheet_id)
 
 
+def build_error_code_map(error_codes: Iterable[ErrorCode]) -> dict[str, ErrorCode]:
+    return {code.code: code for code in error_codes}
+
+
+def build_error_code_options(error_codes: Iterable[ErrorCode]) -> dict[str, ErrorCode]:
+    """Map each multiselect label (see ErrorCode.as_option) to its error code."""
+    return {code.as_option(): code for code in error_codes}
+
+
 def apply_error_codes(
     selected_labels: Iterable[str],
-    error_codes: Iterable[ErrorCode],
+    error_codes: Mapping[str, ErrorCode] | Iterable[ErrorCode],
+    current_points: float,
+    current_markdown: str,
+) -> tuple[float, str]:
+    # Callers that keep a prebuilt map (see build_error_code_map) skip rebuilding it here
+    code_map = error_codes if isinstance(error_codes, Mapping) else build_error_code_map(error_codes)
+    selected_codes = (code_map.get(label.split(":", 1)[0].strip()) for label in selected_labels)
+    return apply_selected_error_codes(
+        (info for info in selected_codes if info is not None),
+        current_points,
+        current_markdown,
+    )
+
+
+def apply_selected_error_codes(
+    selected_codes: Iterable[ErrorCode],
     current_points: float,
     current_markdown: str,
 ) -> tuple[float, str]:
-    code_map = {code.code: code for code in error_codes}
     updated_points = current_points
     updated_markdown = current_markdown
 
-    for label in selected_labels:
-        code = label.split(":", 1)[0].strip()
-        if code not in code_map:
-            continue
-        info = code_map[code]
+    for info in selected_codes:
         updated_points = max(0.0, updated_points - info.deduction)
         if info.comment:
             updated_markdown += f"\n\n ### {info.description}: -{info.deduction:g}P\n{info.comment}"
@@ -1,19 +1,21 @@
 from __future__ import annotations
 
 import os
+import stat
 from collections import Counter
-from pathlib import Path
-from typing import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Sequence, TypeVar
 
 import streamlit as st
 
 try:  # Allow running inside the app directory or as a package import
-    from helpers import SubmissionRecord
+    from helpers import EXERCISE_DIR_PATTERN, SubmissionRecord
 except ImportError:  # pragma: no cover - fallback for package imports
-    from .helpers import SubmissionRecord
+    from .helpers import EXERCISE_DIR_PATTERN, SubmissionRecord
 
 __all__ = [
     "find_candidate_roots",
+    "clear_candidate_roots_cache",
     "build_exercise_options",
     "filter_submissions",
     "classify_pdf_candidates",
@@ -24,51 +26,100 @@ __all__ = [
 ]
 
 
-COMPLETED_STATUSES = {"FINAL_MARK", "PROVISIONAL_MARK"}
+COMPLETED_STATUSES = frozenset({"FINAL_MARK", "PROVISIONAL_MARK"})
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# Below this many items a thread pool costs more than it saves
+_PARALLEL_MIN_ITEMS = 8
+_PARALLEL_WORKERS = 8
+
+
+def _map_maybe_parallel(fn: Callable[[_T], _R], items: Sequence[_T]) -> list[_R]:
+    """Apply ``fn`` to every item in order, on a thread pool once there are enough items.
+
+    Meant for filesystem probes: their syscalls release the GIL, so slow storage benefits
+    from overlapping them.
+    """
+
+    if len(items) < _PARALLEL_MIN_ITEMS:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=_PARALLEL_WORKERS) as executor:
+        return list(executor.map(fn, items))
 
 
 def find_candidate_roots(base_dir: os.PathLike[str] | str) -> list[str]:
-    """Return directories that look like valid sheet roots."""
+    """Return directories that look like valid sheet roots.
+
+    Cached per modification time of ``base_dir`` for up to a minute; call
+    ``clear_candidate_roots_cache`` after changing the data directory.
+    """
+
+    base_path = os.fspath(base_dir)
+    try:
+        mtime_ns = os.stat(base_path).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    return _scan_roots(base_path, mtime_ns)
 
-    base_path = Path(base_dir)
-    if not base_path.exists():
+
+# scandir entries carry d_type, so is_dir() needs no extra stat per entry
+def _is_sheet_entry(entry: os.DirEntry) -> bool:
+    if entry.name == "marks.csv":
+        return True
+    return EXERCISE_DIR_PATTERN.match(entry.name) is not None and entry.is_dir()
+
+
+# helper to check if a directory is a sheet root; stops at the first match
+def _is_sheet_root(path: str) -> bool:
+    try:
+        with os.scandir(path) as it:
+            return any(_is_sheet_entry(entry) for entry in it)
+    except PermissionError:
+        return False
+
+
+def _canonical_path(entry: os.DirEntry) -> str:
+    # Entries are listed under an already resolved directory, so only symlinks need realpath
+    return os.path.realpath(entry.path) if entry.is_symlink() else entry.path
+
+
+def _probe_root_candidates(item: os.DirEntry) -> list[str]:
+    """Return the sheet roots at ``item`` itself and one level below it."""
+
+    path = _canonical_path(item)
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except PermissionError:
         return []
 
     candidates: list[str] = []
-    
-    # helper to check if a directory is a sheet root
-    def is_sheet_root(path: Path) -> bool:
-        if not path.is_dir():
-             return False
-        try:
-            entries = list(path.iterdir())
-        except PermissionError:
-            return False
-            
-        has_marks = (path / "marks.csv").exists()
-        has_exercises = any(
-            entry.is_dir() and entry.name.lower().startswith(("excercise-", "exercise-"))
-            for entry in entries
-        )
-        return has_marks or has_exercises
-
-    # Level 1 check
-    for item_path in base_path.iterdir():
-        if not item_path.is_dir():
-            continue
-            
-        if is_sheet_root(item_path):
-            candidates.append(str(item_path.resolve()))
-        
-        # Level 2 check
-        try:
-            for sub_item in item_path.iterdir():
-                if sub_item.is_dir() and is_sheet_root(sub_item):
-                    candidates.append(str(sub_item.resolve()))
-        except PermissionError:
-            continue
+    # One listing answers both the level 1 check and the level 2 walk
+    if any(_is_sheet_entry(entry) for entry in entries):
+        candidates.append(path)
+
+    # Level 2 check
+    for sub_item in entries:
+        if sub_item.is_dir() and _is_sheet_root(sub_item.path):
+            candidates.append(_canonical_path(sub_item))
+    return candidates
+
+
+# mtime_ns only keys the cache, so adding or removing a top-level folder forces a fresh scan
+@st.cache_data(ttl=60, max_entries=16, show_spinner=False)
+def _scan_roots(base_path: str, mtime_ns: int) -> list[str]:
+    # Level 1 check; the base is resolved once instead of once per candidate
+    with os.scandir(os.path.realpath(base_path)) as it:
+        items = [entry for entry in it if entry.is_dir()]
 
-    return sorted(set(candidates))
+    results = _map_maybe_parallel(_probe_root_candidates, items)
+    return sorted({candidate for found in results for candidate in found})
+
+
+def clear_candidate_roots_cache() -> None:
+    _scan_roots.clear()
 
 
 def build_exercise_options(submissions: Sequence[SubmissionRecord]) -> list[str]:
@@ -82,40 +133,58 @@ def filter_submissions(
     submissions: Iterable[SubmissionRecord],
     selected_exercise: str,
 ) -> list[SubmissionRecord]:
-    """Filter submissions to the exercise code if not 'Alle'."""
+    """Filter submissions to the exercise code if not 'Alle'.
+
+    With 'Alle', a list input is returned as-is (not copied); callers must not mutate it.
+    """
 
     if selected_exercise == "Alle":
-        return list(submissions)
+        return submissions if isinstance(submissions, list) else list(submissions)
     return [record for record in submissions if record.exercise_code == selected_exercise]
 
 
+def _pdf_issue(path: str) -> str | None:
+    """Return why ``path`` cannot be shown as a PDF, or None if it can."""
+
+    # One stat answers existence, type and size; the header is read unbuffered
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return "Datei nicht gefunden"
+    except OSError as exc:
+        return f"Datei konnte nicht gelesen werden: {exc}"
+
+    if not stat.S_ISREG(stat_result.st_mode):
+        return "Pfad ist keine Datei"
+    if stat_result.st_size < 4:
+        return "Datei besitzt keinen PDF-Header"
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            header = os.read(fd, 4)
+        finally:
+            os.close(fd)
+    except OSError as exc:
+        return f"Datei konnte nicht gelesen werden: {exc}"
+    if not header.startswith(b"%PDF"):
+        return "Datei besitzt keinen PDF-Header"
+    return None
+
+
 def classify_pdf_candidates(pdfs: Iterable[str]) -> tuple[list[str], list[tuple[str, str]]]:
     """Return readable PDFs plus (path, reason) tuples for anything we skip."""
 
     valid: list[str] = []
     issues: list[tuple[str, str]] = []
 
-    for candidate in pdfs:
-        path = Path(candidate)
-        reason: str | None = None
-
-        if not path.exists():
-            reason = "Datei nicht gefunden"
-        elif not path.is_file():
-            reason = "Pfad ist keine Datei"
-        else:
-            try:
-                with path.open("rb") as handle:
-                    header = handle.read(4)
-                if len(header) < 4 or not header.startswith(b"%PDF"):
-                    reason = "Datei besitzt keinen PDF-Header"
-            except OSError as exc:
-                reason = f"Datei konnte nicht gelesen werden: {exc}"
+    paths = [os.fspath(candidate) for candidate in pdfs]
+    reasons = _map_maybe_parallel(_pdf_issue, paths)
 
+    for path, reason in zip(paths, reasons):
         if reason:
-            issues.append((str(path), reason))
+            issues.append((path, reason))
         else:
-            valid.append(str(path))
+            valid.append(path)
 
     return valid, issues
 
@@ -124,17 +193,20 @@ def filter_by_search(
     submissions: Iterable[SubmissionRecord],
     query: str,
 ) -> list[SubmissionRecord]:
-    """Filter submissions by submitter or group name using a case-insensitive query."""
+    """Filter submissions by submitter or group name using a case-insensitive query.
+
+    An empty query returns a list input as-is (not copied); callers must not mutate it.
+    """
 
     normalized = (query or "").strip().lower()
     if not normalized:
-        return list(submissions)
+        return submissions if isinstance(submissions, list) else list(submissions)
 
-    def _matches(record: SubmissionRecord) -> bool:
-        haystacks = (record.submitter.lower(), record.group_name.lower())
-        return any(normalized in haystack for haystack in haystacks)
-
-    return [record for record in submissions if _matches(record)]
+    return [
+        record
+        for record in submissions
+        if normalized in record.submitter_lc or normalized in record.group_name_lc
+    ]
 
 
 def sort_submissions(
@@ -147,7 +219,7 @@ def sort_submissions(
     submissions = list(submissions)
 
     if mode == "alphabetisch":
-        return sorted(submissions, key=lambda r: (r.submitter.lower(), r.id))
+        return sorted(submissions, key=lambda r: (r.submitter_lc, r.id))
 
     if mode == "status: offen zuerst":
         return sorted(
@@ -167,9 +239,9 @@ def sort_submissions(
 def compute_progress_stats(submissions: Iterable[SubmissionRecord]) -> dict[str, object]:
     """Return aggregate stats (total, corrected, and per-status counts)."""
 
-    submissions = list(submissions)
-    total = len(submissions)
+    # Single pass over the records; totals are derived from the (few) distinct statuses
     status_counter = Counter(record.status for record in submissions)
+    total = sum(status_counter.values())
     corrected = sum(count for status, count in status_counter.items() if status in COMPLETED_STATUSES)
     return {
         "total": total,
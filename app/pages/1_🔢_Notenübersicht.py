@@ -3,6 +3,7 @@ import pandas as pd
 from pathlib import Path
 import io
 import altair as alt
+import numpy as np
 
 st.title("Notenübersicht")
 
@@ -24,106 +25,147 @@ if not current_root:
     st.stop()
 
 marks_path = Path(current_root) / "marks.csv"
-if not marks_path.exists():
+# One stat answers both "does it exist" and the cache key below
+try:
+    current_mtime = marks_path.stat().st_mtime_ns
+except FileNotFoundError:
     st.error(f"marks.csv not found in {current_root}")
     st.stop()
 
-@st.cache_data
-def load_csv_data(path: Path, mtime: float):
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_csv_data(path: str, mtime: int):
     # mtime is passed just to invalidate cache on file change
     try:
         df = pd.read_csv(path)
         # Clean column names
-        df.columns = df.columns.str.replace('^#\s*', '', regex=True).str.strip()
+        df.columns = df.columns.str.replace(r'^#\s*', '', regex=True).str.strip()
         return df
     except Exception as e:
         return None
 
-# Load the CSV
-try:
-    current_mtime = marks_path.stat().st_mtime
-    df = load_csv_data(marks_path, current_mtime)
-    
-    if df is None:
-        st.error(f"Error loading CSV from {marks_path}")
-        st.stop()
-        
-    st.subheader("CSV Editor")
-    edited_df = st.data_editor(df, num_rows="dynamic", use_container_width=True)
+# Hash frames in one vectorized pass (plus the header, which row hashes do not cover)
+@st.cache_data(
+    max_entries=8,
+    show_spinner=False,
+    hash_funcs={
+        pd.DataFrame: lambda frame: (
+            tuple(frame.columns),
+            pd.util.hash_pandas_object(frame, index=True).values.tobytes(),
+        )
+    },
+)
+def build_xlsx_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Noten')
+    return buffer.getvalue()
 
-    st.divider()
-    st.subheader("📊 Statistiken")
+# Bin on the server so the chart only ships one row per bin to the browser
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_points_histogram(points: np.ndarray, bins: int = 20) -> pd.DataFrame:
+    counts, edges = np.histogram(points, bins=bins)
+    return pd.DataFrame({"lo": edges[:-1], "hi": edges[1:], "count": counts})
+
+# Editing cells reruns only this part, so the CSV is not reloaded from the cache on every edit
+@st.fragment
+def render_marks_editor(df: pd.DataFrame) -> None:
+    try:
+        st.subheader("CSV Editor")
+        edited_df = st.data_editor(df, num_rows="dynamic", use_container_width=True)
+
+        st.divider()
+        st.subheader("📊 Statistiken")
     
-    if "points" in edited_df.columns:
-        # Convert to numeric, coercing errors
-        points_series = pd.to_numeric(edited_df["points"], errors="coerce").dropna()
+        if "points" in edited_df.columns:
+            # Convert to numeric, coercing errors
+            points_series = pd.to_numeric(edited_df["points"], errors="coerce").dropna()
         
-        stat_col1, stat_col2 = st.columns([2, 1], gap="large")
+            stat_col1, stat_col2 = st.columns([2, 1], gap="large")
         
-        with stat_col1:
-            st.markdown("#### Punkteverteilung")
-            if not points_series.empty:
-                # Metrics Row
-                m1, m2, m3, m4 = st.columns(4)
-                m1.metric("Durchschnitt", f"{points_series.mean():.2f}")
-                m2.metric("Median", f"{points_series.median():.2f}")
-                m3.metric("Min", f"{points_series.min():.2f}")
-                m4.metric("Max", f"{points_series.max():.2f}")
+            with stat_col1:
+                st.markdown("#### Punkteverteilung")
+                if not points_series.empty:
+                    # Metrics Row
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Durchschnitt", f"{points_series.mean():.2f}")
+                    m2.metric("Median", f"{points_series.median():.2f}")
+                    m3.metric("Min", f"{points_series.min():.2f}")
+                    m4.metric("Max", f"{points_series.max():.2f}")
                 
-                # Bar Chart
-                chart = alt.Chart(edited_df).mark_bar().encode(
-                    x=alt.X("points", bin=alt.Bin(maxbins=20), title="Punkte"),
-                    y=alt.Y("count()", title="Anzahl Abgaben"),
-                    tooltip=["count()", alt.Tooltip("points", bin=True, title="Punktebereich")]
-                ).interactive().properties(height=300)
-                st.altair_chart(chart, use_container_width=True)
-            else:
-                st.info("Keine numerischen Punkte vorhanden.")
+                    # Bar Chart
+                    hist_df = build_points_histogram(points_series.to_numpy(dtype=float))
+                    chart = alt.Chart(hist_df).mark_bar().encode(
+                        x=alt.X("lo:Q", title="Punkte"),
+                        x2="hi:Q",
+                        y=alt.Y("count:Q", title="Anzahl Abgaben"),
+                        tooltip=[
+                            alt.Tooltip("lo:Q", title="Von", format="g"),
+                            alt.Tooltip("hi:Q", title="Bis", format="g"),
+                            alt.Tooltip("count:Q", title="Anzahl"),
+                        ],
+                    ).interactive().properties(height=300)
+                    st.altair_chart(chart, use_container_width=True)
+                else:
+                    st.info("Keine numerischen Punkte vorhanden.")
 
-        with stat_col2:
-            st.markdown("#### Status")
-            if "status" in edited_df.columns:
-                status_counts = edited_df["status"].value_counts().reset_index()
-                status_counts.columns = ["status", "count"]
+            with stat_col2:
+                st.markdown("#### Status")
+                if "status" in edited_df.columns:
+                    status_counts = edited_df["status"].value_counts().reset_index()
+                    status_counts.columns = ["status", "count"]
                 
-                status_chart = alt.Chart(status_counts).mark_arc(innerRadius=50).encode(
-                    theta="count",
-                    color=alt.Color("status", legend=alt.Legend(title="Status")),
-                    tooltip=["status", "count"]
-                ).properties(height=300)
-                st.altair_chart(status_chart, use_container_width=True)
-            else:
-                st.warning("Keine 'status' Spalte gefunden.")
+                    status_chart = alt.Chart(status_counts).mark_arc(innerRadius=50).encode(
+                        theta="count",
+                        color=alt.Color("status", legend=alt.Legend(title="Status")),
+                        tooltip=["status", "count"]
+                    ).properties(height=300)
+                    st.altair_chart(status_chart, use_container_width=True)
+                else:
+                    st.warning("Keine 'status' Spalte gefunden.")
                 
-    else:
-        st.warning("Spalte 'points' nicht gefunden. Bitte überprüfen Sie die CSV-Kopfzeile.")
+        else:
+            st.warning("Spalte 'points' nicht gefunden. Bitte überprüfen Sie die CSV-Kopfzeile.")
 
-    st.divider()
-    st.subheader("Export")
+        st.divider()
+        st.subheader("Export")
     
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        edited_df.to_excel(writer, index=False, sheet_name='Noten')
-    
-    st.download_button(
-        label="Download als Excel",
-        data=buffer.getvalue(),
-        file_name="noten_export.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        icon=":material/download:"
-    )
+        st.download_button(
+            label="Download als Excel",
+            data=build_xlsx_bytes(edited_df),
+            file_name="noten_export.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            icon=":material/download:"
+        )
+
+    except Exception as e:
+        st.error(f"Error loading CSV: {e}")
+        st.stop()
+
+    left, right = st.columns(2, vertical_alignment="center")
+    if left.button("Save Changes", type="primary", icon=":material/save:"):
+        try:
+            # Rewriting an unchanged sheet would only bump the mtime and invalidate the cache
+            if edited_df.equals(df):
+                st.info("Keine Änderungen zum Speichern.")
+            else:
+                edited_df.to_csv(marks_path, index=False)
+                st.success("Changes saved successfully!")
+        except Exception as e:
+            st.error(f"Error saving CSV: {e}")
 
+    if right.button("Zurück zu Korrekturen", icon=":material/arrow_back:" ):
+        st.switch_page("🖎_Korrektur.py")
+
+
+# Load the CSV
+try:
+    df = load_csv_data(str(marks_path), current_mtime)
 except Exception as e:
     st.error(f"Error loading CSV: {e}")
     st.stop()
 
-left, right = st.columns(2, vertical_alignment="center")
-if left.button("Save Changes", type="primary", icon=":material/save:"):
-    try:
-        edited_df.to_csv(marks_path, index=False)
-        st.success("Changes saved successfully!")
-    except Exception as e:
-        st.error(f"Error saving CSV: {e}")
+if df is None:
+    st.error(f"Error loading CSV from {marks_path}")
+    st.stop()
 
-if right.button("Zurück zu Korrekturen", icon=":material/arrow_back:" ):
-    st.switch_page("🖎_Korrektur.py")
\ No newline at end of file
+render_marks_editor(df)
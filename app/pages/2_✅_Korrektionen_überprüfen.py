@@ -1,12 +1,12 @@
 from pathlib import Path
-from re import split
 
 import streamlit as st
 from streamlit_pdf_viewer import pdf_viewer
 
-from utils import find_pdfs_in_submission
+from utils import find_pdfs_in_submission, read_pdf_bytes
 import os
 from db import (
+    get_submission_exercise_codes,
     get_submissions,
     get_feedback,
     get_sheet_id_by_name,
@@ -16,6 +16,8 @@ from review_state import ReviewStateManager
 from helpers import SheetContext
 from answer_sheet import resolve_answer_sheet_status, setup_answer_sheet_toggle
 
+CORRECTED_STATUSES = frozenset(("FINAL_MARK", "PROVISIONAL_MARK"))
+
 
 st.set_page_config(
     page_title="Sifr | Korrekturen überprüfen | Split view mode",
@@ -44,15 +46,13 @@ sheet_context = SheetContext(
 state_manager = ReviewStateManager(current_root, current_sheet_id)
 state_manager.ensure_defaults()
 
-# Load submissions + feedback map
-submissions = get_submissions()
-feedback_ids = get_feedback_submission_ids()
-if not submissions:
+# Exercises with at least one submission
+exercise_names = get_submission_exercise_codes()
+if not exercise_names:
     st.warning("Keine Submissions gefunden. Bitte Archive überprüfen.")
     st.stop()
 
 # Filter by exercise
-exercise_names = sorted({row[4] for row in submissions})
 exercise_options = ["Alle"] + exercise_names if exercise_names else ["Alle"]
 
 # Lade den letzten Filter aus der Datenbank
@@ -69,83 +69,72 @@ selected_exercise = st.sidebar.selectbox(
 if selected_exercise != current_filter:
     state_manager.persist_exercise_filter(selected_exercise)
 
-filtered_submissions = [
-    row for row in submissions if selected_exercise == "Alle" or row[4] == selected_exercise
-]
-
-# Show progress bar in sidebar
-total_count = len(filtered_submissions)
-corrected_count = sum(
-    1 for row in filtered_submissions 
-    if row[5] in ("FINAL_MARK", "PROVISIONAL_MARK") or row[0] in feedback_ids
-)
-
-if total_count > 0:
-    progress = corrected_count / total_count
-    st.sidebar.progress(progress, text=f"{corrected_count} / {total_count} erledigt")
-
-# Build submission labels and map
-def build_submission_label(row):
-    submission_id = row[0]
-    corrected = row[5] in ("FINAL_MARK", "PROVISIONAL_MARK") or submission_id in feedback_ids
-    status_flag = "✅" if corrected else "⭕"
-    return f"{status_flag} {row[3]} ({row[4]})"
-
-submission_labels = [build_submission_label(row) for row in filtered_submissions]
-selectbox_key = state_manager.submission_selectbox_key(selected_exercise)
+# The exercise filter runs in SQL; one pass then counts progress and builds the label/id maps
+submissions = get_submissions(None if selected_exercise == "Alle" else selected_exercise)
+feedback_ids = get_feedback_submission_ids()
 
-# Create comprehensive maps
+submission_labels = []
 submission_id_map = {}  # label -> id
 id_to_label_map = {}    # id -> label
+id_to_row = {}          # id -> row
 submission_ids_ordered = []  # ids in order
+corrected_count = 0
 
-for row in filtered_submissions:
-    label = build_submission_label(row)
+for row in submissions:
     submission_id = row[0]
+    corrected = row[5] in CORRECTED_STATUSES or submission_id in feedback_ids
+    corrected_count += corrected
+    label = f"{'✅' if corrected else '⭕'} {row[3]} ({row[4]})"
+    submission_labels.append(label)
     submission_id_map[label] = submission_id
     id_to_label_map[submission_id] = label
+    id_to_row[submission_id] = row
     submission_ids_ordered.append(submission_id)
 
+# Show progress bar in sidebar
+total_count = len(submission_ids_ordered)
+if total_count > 0:
+    progress = corrected_count / total_count
+    st.sidebar.progress(progress, text=f"{corrected_count} / {total_count} erledigt")
+
+selectbox_key = state_manager.submission_selectbox_key(selected_exercise)
+
 # Handle no submissions after filter
 if not submission_labels:
     st.sidebar.warning("Keine Abgaben verfügbar mit diesem Filter.")
     st.stop()
 
 # ==================== NAVIGATION BUTTONS (BEFORE SELECTBOX) ====================
-# Process navigation FIRST, then resolve which submission to show
-
 current_id = state_manager.resolve_current_submission(submission_ids_ordered, id_to_label_map)
 current_index = submission_ids_ordered.index(current_id)
 
-# Display navigation buttons
+# Display navigation buttons; the callbacks persist the new id before the rerun starts
 col_prev, col_next = st.sidebar.columns([1, 1])
 
 with col_prev:
-    if st.button("Letzte", key="review_prev_btn", use_container_width=True, disabled=(current_index <= 0)):
-        if current_index > 0:
-            st.session_state.review_nav_action = "prev"
-
-
+    st.button(
+        "Letzte",
+        key="review_prev_btn",
+        use_container_width=True,
+        disabled=(current_index <= 0),
+        on_click=state_manager.step_submission,
+        args=(submission_ids_ordered, current_index, -1, id_to_label_map, selectbox_key),
+    )
 
 with col_next:
-    if st.button("Nächste",type="primary", key="review_next_btn", use_container_width=True, disabled=(current_index >= len(submission_ids_ordered) - 1)):
-        if current_index < len(submission_ids_ordered) - 1:
-            st.session_state.review_nav_action = "next"
+    st.button(
+        "Nächste",
+        type="primary",
+        key="review_next_btn",
+        use_container_width=True,
+        disabled=(current_index >= len(submission_ids_ordered) - 1),
+        on_click=state_manager.step_submission,
+        args=(submission_ids_ordered, current_index, 1, id_to_label_map, selectbox_key),
+    )
 
 with st.sidebar:
     st.metric("Position", f"{current_index + 1}/{len(submission_ids_ordered)}")
 
-# Handle navigation action
-if st.session_state.review_nav_action:
-    if st.session_state.review_nav_action == "prev" and current_index > 0:
-        new_id = submission_ids_ordered[current_index - 1]
-        state_manager.persist_submission_id(new_id)
-    elif st.session_state.review_nav_action == "next" and current_index < len(submission_ids_ordered) - 1:
-        new_id = submission_ids_ordered[current_index + 1]
-        state_manager.persist_submission_id(new_id)
-    st.session_state.review_nav_action = None
-    st.rerun()
-
 # ==================== SUBMISSION SELECTOR ====================
 current_label = id_to_label_map[current_id]
 
@@ -170,12 +159,12 @@ if selected_label != current_label:
 
 # Get current submission details
 submission_id = submission_id_map[selected_label]
-submission_row = next(row for row in filtered_submissions if row[0] == submission_id)
+submission_row = id_to_row[submission_id]
 submission_path = submission_row[1]
 group_name = submission_row[2]
 submitter = submission_row[3]
 exercise_code = submission_row[4]
-exercise_number = split("-", exercise_code)[1]
+exercise_number = exercise_code.partition("-")[2]
 
 # Main content
 st.sidebar.markdown(f"""Aufgabe # {exercise_number}
@@ -213,7 +202,7 @@ with col1:
                 if not os.path.basename(pdf_file).startswith(f"feedback_{group_name}"):
                     try:
                         pdf_viewer(
-                            str(pdf_file),
+                            read_pdf_bytes(pdf_file),
                             resolution_boost=2,
                             width="100%",
                             render_text=True,
@@ -228,15 +217,17 @@ with col1:
 
 with col2:
     if feedback:
-        feedback_pdf_dir = Path(submission_path)
-        feedback_pdfs = (
-            sorted(feedback_pdf_dir.glob("feedback_*.pdf")) if feedback_pdf_dir.exists() else []
+        # Reuses the cached folder listing instead of globbing the directory again
+        feedback_pdfs = sorted(
+            pdf_file
+            for pdf_file in find_pdfs_in_submission(submission_path)
+            if os.path.basename(pdf_file).startswith("feedback_") and pdf_file.endswith(".pdf")
         )
         if feedback_pdfs:
             for pdf_file in feedback_pdfs:
                 try:
                     pdf_viewer(
-                        str(pdf_file),
+                        read_pdf_bytes(pdf_file),
                         resolution_boost=2,
                         width="100%",
                         render_text=True,
@@ -252,7 +243,7 @@ if show_answer_sheet and col3 is not None:
         if answer_sheet_status.effective_path:
             try:
                 pdf_viewer(
-                    str(answer_sheet_status.effective_path),
+                    read_pdf_bytes(answer_sheet_status.effective_path),
                     resolution_boost=2,
                     width="100%",
                     render_text=True,
@@ -11,6 +11,7 @@ try:
         update_error_code,
         get_error_codes,
         get_sheets,
+        transaction,
     )
 except ImportError:  # pragma: no cover - fallback when running via "streamlit run app/..."
     from db import (
@@ -19,6 +20,7 @@ except ImportError:  # pragma: no cover - fallback when running via "streamlit r
         update_error_code,
         get_error_codes,
         get_sheets,
+        transaction,
     )
 import pandas as pd
 
@@ -137,25 +139,27 @@ else:
             edited_ids = set(edited_df["id"].dropna()) # dropna because new rows have NaN id
             
             ids_to_delete = original_ids - edited_ids
-            for eid in ids_to_delete:
-                delete_error_code_by_id(eid)
-
-            # 2. Handle updates and additions
-            for index, row in edited_df.iterrows():
-                eid = row["id"]
-                code = row["Code"]
-                desc = row["Beschreibung"]
-                abzug = row["Abzug"]
-                komm = row["Kommentar"]
+            # Apply the whole edit as one transaction: a single commit, all or nothing
+            with transaction():
+                for eid in ids_to_delete:
+                    delete_error_code_by_id(eid)
+
+                # 2. Handle updates and additions
+                for index, row in edited_df.iterrows():
+                    eid = row["id"]
+                    code = row["Code"]
+                    desc = row["Beschreibung"]
+                    abzug = row["Abzug"]
+                    komm = row["Kommentar"]
                 
-                if bool(pd.isna(eid)):
-                    if isinstance(code, str) and isinstance(desc, str) and code and desc:
-                        add_error_code(selected_sheet_id, code, desc, abzug, komm)
-                else:
-                    # Update existing
-                    # Check if changed? For simplicity, just update all present
-                    if eid in original_ids:
-                         update_error_code(eid, code, desc, abzug, komm)
+                    if bool(pd.isna(eid)):
+                        if isinstance(code, str) and isinstance(desc, str) and code and desc:
+                            add_error_code(selected_sheet_id, code, desc, abzug, komm)
+                    else:
+                        # Update existing
+                        # Check if changed? For simplicity, just update all present
+                        if eid in original_ids:
+                             update_error_code(eid, code, desc, abzug, komm)
             
             st.success("Änderungen gespeichert!")
             st.rerun()
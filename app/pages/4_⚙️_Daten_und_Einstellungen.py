@@ -6,13 +6,12 @@ import streamlit as st
 
 from answer_sheet import render_answer_sheet_sidebar
 from db import (
+    get_exercise_max_points,
     get_sheet_id_by_name,
-    get_submissions,
     save_exercise_max_points,
     scan_and_insert_submissions,
 )
-from helpers import convert_submissions, resolve_sheet_context
-from korrektur_utils import build_exercise_options
+from helpers import resolve_sheet_context
 from sidebar_panels import ensure_session_defaults, render_archive_loader
 
 st.set_page_config(
@@ -21,6 +20,13 @@ st.set_page_config(
     layout="wide",
 )
 
+
+def _save_max_points(exercise: str, sheet_id: int) -> None:
+    key = f"max_points_{sheet_id}_{exercise}"
+    if key in st.session_state:
+        save_exercise_max_points(exercise, st.session_state[key], sheet_id)
+
+
 ensure_session_defaults()
 
 st.title("Archive & Einstellungen")
@@ -45,34 +51,24 @@ render_answer_sheet_sidebar(sheet_context)
 st.divider()
 st.header("Aufgaben & Reviewer-Optionen")
 
-raw_submissions = get_submissions()
-submissions = convert_submissions(raw_submissions)
-exercise_options = build_exercise_options(submissions)
-exercise_names = [name for name in exercise_options if name != "Alle"]
+# Only the exercises of the current sheet; the same code on another sheet has its own value
+sheet_id = sheet_context.sheet_id if sheet_context else None
+max_points_by_exercise = get_exercise_max_points(sheet_id) if sheet_id is not None else {}
 
-if exercise_names:
+if max_points_by_exercise:
     st.write("Maximale Punkte pro Aufgabe")
 
-    def _make_max_points_callback(exercise: str):
-        def callback():
-            key = f"max_points_{exercise}"
-            if key in st.session_state:
-                value = st.session_state[key]
-                save_exercise_max_points(exercise, value)
-                st.session_state.exercise_max_points[exercise] = value
-
-        return callback
-
-    for exercise in exercise_names:
-        key_name = f"max_points_{exercise}"
-        default_value = float(st.session_state.exercise_max_points.get(exercise, 0.0))
+    for exercise, max_points in max_points_by_exercise.items():
+        key_name = f"max_points_{sheet_id}_{exercise}"
+        default_value = float(max_points or 0.0)
         st.number_input(
             exercise,
             min_value=0.0,
             value=default_value,
             step=0.5,
             key=key_name,
-            on_change=_make_max_points_callback(exercise),
+            on_change=_save_max_points,
+            args=(exercise, sheet_id),
         )
 else:
     st.info("Keine Aufgaben gefunden. Bitte lade ein Archive und scanne die Abgaben.")
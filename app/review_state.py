@@ -19,12 +19,13 @@ class ReviewStateManager:
 
     SUBMISSION_STATE_KEY = "review_submission_id"
     FILTER_STATE_KEY = "review_exercise_filter"
-    NAV_ACTION_KEY = "review_nav_action"
     FILTER_STORAGE_KEY = "review_exercise_filter"
 
     def __init__(self, current_root: str | None, sheet_id: int | None):
         self.current_root = current_root
         self.sheet_id = sheet_id
+        # Stored filter as read by sync_exercise_filter, reused by persist_exercise_filter
+        self._saved_filter: str | None = None
 
     # ------------------------------------------------------------------
     # Session defaults
@@ -32,7 +33,6 @@ class ReviewStateManager:
     def ensure_defaults(self) -> None:
         st.session_state.setdefault(self.SUBMISSION_STATE_KEY, None)
         st.session_state.setdefault(self.FILTER_STATE_KEY, DEFAULT_FILTER)
-        st.session_state.setdefault(self.NAV_ACTION_KEY, None)
 
     # ------------------------------------------------------------------
     # Exercise filter helpers
@@ -42,6 +42,7 @@ class ReviewStateManager:
             return DEFAULT_FILTER
 
         saved_filter = load_grader_state(self.FILTER_STORAGE_KEY, DEFAULT_FILTER)
+        self._saved_filter = saved_filter
         if saved_filter not in exercise_options:
             saved_filter = DEFAULT_FILTER
 
@@ -53,8 +54,12 @@ class ReviewStateManager:
         return current_filter
 
     def persist_exercise_filter(self, value: str) -> None:
-        if value != load_grader_state(self.FILTER_STORAGE_KEY, DEFAULT_FILTER):
+        saved_filter = self._saved_filter
+        if saved_filter is None:
+            saved_filter = load_grader_state(self.FILTER_STORAGE_KEY, DEFAULT_FILTER)
+        if value != saved_filter:
             save_grader_state(self.FILTER_STORAGE_KEY, value)
+            self._saved_filter = value
         st.session_state[self.FILTER_STATE_KEY] = value
 
     # ------------------------------------------------------------------
@@ -81,10 +86,26 @@ class ReviewStateManager:
                 current_id = saved_id
             else:
                 current_id = ordered_ids[0]
+            # Only a changed selection needs writing; a stable one was persisted when it was chosen
+            self.persist_submission_id(current_id)
 
-        self.persist_submission_id(current_id)
         return current_id
 
     def persist_submission_id(self, submission_id: int) -> None:
         st.session_state[self.SUBMISSION_STATE_KEY] = submission_id
         set_review_current_submission_id(submission_id)
+
+    def step_submission(
+        self,
+        ordered_ids: Sequence[int],
+        current_index: int,
+        direction: int,
+        labels_by_id: dict[int, str],
+        selectbox_key: str,
+    ) -> None:
+        """Button callback: move ``direction`` steps and point the selectbox at the new entry."""
+        new_index = current_index + direction
+        if 0 <= new_index < len(ordered_ids):
+            new_id = ordered_ids[new_index]
+            self.persist_submission_id(new_id)
+            st.session_state[selectbox_key] = labels_by_id[new_id]
@@ -7,20 +7,20 @@ from pathlib import Path
 import streamlit as st
 
 from config import get_data_dir
-from db import get_exercise_max_points
-from korrektur_utils import find_candidate_roots
+from korrektur_utils import clear_candidate_roots_cache, find_candidate_roots
 
 DATA_ROOT = get_data_dir()
 DATA_ROOT.mkdir(parents=True, exist_ok=True)
 
+# Read the compressed stream in 1 MiB blocks instead of tarfile's 10 KiB default
+_TAR_STREAM_BUFSIZE = 1 << 20
+
 
 def ensure_session_defaults() -> None:
     state = st.session_state
-    if "exercise_max_points" not in state:
-        state.exercise_max_points = get_exercise_max_points()
-
     state.setdefault("archive_loaded", False)
-    state.setdefault("available_roots", find_candidate_roots(DATA_ROOT))
+    if "available_roots" not in state:
+        state.available_roots = find_candidate_roots(DATA_ROOT)
     if "current_root" not in state:
         roots = state.available_roots
         state.current_root = roots[0] if roots else None
@@ -55,8 +55,12 @@ def render_archive_loader() -> None:
                         target_dir.mkdir(parents=True, exist_ok=True)
                         
                         uploaded_file.seek(0)
-                        with tarfile.open(fileobj=uploaded_file, mode="r:gz") as tar:
+                        # Stream mode extracts members in order without seeking back
+                        with tarfile.open(
+                            fileobj=uploaded_file, mode="r|gz", bufsize=_TAR_STREAM_BUFSIZE
+                        ) as tar:
                             tar.extractall(str(target_dir), filter="data")
+                        clear_candidate_roots_cache()
                         candidates = find_candidate_roots(DATA_ROOT)
                         if candidates:
                             st.session_state.available_roots = candidates
@@ -3,18 +3,36 @@ import os, sys
 from pathlib import Path
 from loguru import logger
 
+import streamlit as st
+
 import pypandoc
 
 
 def find_pdfs_in_submission(submission_path):
     """Find all PDF files in the submission directory."""
-    if not os.path.exists(submission_path):
+    try:
+        mtime_ns = os.stat(submission_path).st_mtime_ns
+    except FileNotFoundError:
         return []
-    pdfs = []
-    for file in os.listdir(submission_path):
-        if file.lower().endswith('.pdf'):
-            pdfs.append(os.path.join(submission_path, file))
-    return pdfs
+    return list(_list_pdfs(submission_path, mtime_ns))
+
+# Keyed on the folder mtime, so a newly written feedback PDF shows up on the next rerun
+@st.cache_data(ttl=300, max_entries=512, show_spinner=False)
+def _list_pdfs(submission_path, mtime_ns):
+    with os.scandir(submission_path) as entries:
+        return tuple(entry.path for entry in entries if entry.name.lower().endswith('.pdf'))
+
+def read_pdf_bytes(pdf_path):
+    """Return the contents of a PDF, cached per path and modification time."""
+    pdf_path = os.fspath(pdf_path)
+    return _read_pdf_bytes(pdf_path, os.stat(pdf_path).st_mtime_ns)
+
+# bytes are immutable, so cache_resource can hand out the cached object without copying it.
+# Scans can be tens of MB each: keep only the few PDFs of the current review step, and not for long.
+@st.cache_resource(ttl=300, max_entries=8, show_spinner=False)
+def _read_pdf_bytes(pdf_path, mtime_ns):
+    with open(pdf_path, 'rb') as handle:
+        return handle.read()
 
 def generate_feedback_pdf(markdown_content, name, points, output_path, sheet_number, exercise_number):
     """Generate a PDF from markdown content using pandoc and xelatex."""
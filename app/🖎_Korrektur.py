@@ -10,9 +10,10 @@ from loguru import logger
 
 from db import (
     get_error_codes,
+    get_exercise_max_points,
     get_sheet_id_by_name,
     get_feedback,
-    get_submissions,
+    get_submission_records,
     init_db,
     save_feedback_with_submission,
     scan_and_insert_submissions,
@@ -34,8 +35,8 @@ from helpers import (
     ErrorCode,
     SheetContext,
     SubmissionRecord,
-    apply_error_codes,
-    convert_submissions,
+    apply_selected_error_codes,
+    build_error_code_options,
     resolve_sheet_context,
 )
 from korrektur_utils import (
@@ -49,6 +50,8 @@ from korrektur_utils import (
 )
 from sidebar_panels import ensure_session_defaults
 
+MAX_SELECTBOX_OPTIONS = 500
+_DIGITS_RE = re.compile(r"\d+")
 
 st.set_page_config(
     page_title="Sifr | Korrektur | Feedback Dateien erstellen",
@@ -159,6 +162,32 @@ def fetch_error_codes(sheet_context: SheetContext | None) -> list[ErrorCode]:
     return [ErrorCode.from_row(row) for row in rows]
 
 
+def fetch_exercise_max_points(sheet_context: SheetContext | None) -> dict[str, float]:
+    if not sheet_context or sheet_context.sheet_id is None:
+        return {}
+    return get_exercise_max_points(sheet_context.sheet_id)
+
+
+def _apply_selected_errors(
+    submission_id: int,
+    points_key: str,
+    markdown_key: str,
+    error_codes_by_label: dict[str, ErrorCode],
+) -> None:
+    selected_errors = st.session_state.get(f"error_codes_select_{submission_id}") or []
+    if not selected_errors:
+        st.session_state[f"error_codes_result_{submission_id}"] = False
+        return
+
+    # Callbacks run before the widgets are drawn, so their state can be updated in place
+    st.session_state[points_key], st.session_state[markdown_key] = apply_selected_error_codes(
+        (error_codes_by_label[label] for label in selected_errors),
+        st.session_state[points_key],
+        st.session_state[markdown_key],
+    )
+    st.session_state[f"error_codes_result_{submission_id}"] = True
+
+
 def render_error_code_section(
     submission_id: int,
     points_key: str,
@@ -166,49 +195,57 @@ def render_error_code_section(
     sheet_context: SheetContext | None,
 ):
     st.subheader("Fehlercodes")
-    left_col_error, right_col_error = st.columns((7, 3), vertical_alignment="bottom")
-    error_codes = fetch_error_codes(sheet_context)
-    options = [code.as_option() for code in error_codes]
+    error_codes_by_label = build_error_code_options(fetch_error_codes(sheet_context))
+    options = list(error_codes_by_label)
     if not options:
         st.info("Für diese Übungsserie sind noch keine Fehlercodes hinterlegt.")
 
-    selected_errors = left_col_error.multiselect(
-        "Häufige Fehler",
-        options,
-        key=f"error_codes_select_{submission_id}",
-    )
-
-    if right_col_error.button("Fehler anwenden", key=f"apply_errors_{submission_id}"):
-        if not selected_errors:
-            st.error("Bitte Fehler auswählen.")
-            return
-
-        updated_points, updated_markdown = apply_error_codes(
-            selected_errors,
-            error_codes,
-            st.session_state[points_key],
-            st.session_state[markdown_key],
+    # Picking codes only reruns once the selection is applied
+    with st.form(f"error_codes_form_{submission_id}", border=False):
+        left_col_error, right_col_error = st.columns((7, 3), vertical_alignment="bottom")
+        left_col_error.multiselect(
+            "Häufige Fehler",
+            options,
+            key=f"error_codes_select_{submission_id}",
+        )
+        right_col_error.form_submit_button(
+            "Fehler anwenden",
+            key=f"apply_errors_{submission_id}",
+            on_click=_apply_selected_errors,
+            args=(submission_id, points_key, markdown_key, error_codes_by_label),
         )
-        st.session_state[f"pending_points_{submission_id}"] = updated_points
-        st.session_state[f"pending_markdown_{submission_id}"] = updated_markdown
+
+    applied = st.session_state.pop(f"error_codes_result_{submission_id}", None)
+    if applied:
         st.success("Fehler angewendet!")
-        st.rerun()
+    elif applied is False:
+        st.error("Bitte Fehler auswählen.")
+
+
+def _add_meme(submission_id: int, markdown_key: str) -> None:
+    meme_link = st.session_state.get(f"meme_link_{submission_id}")
+    if meme_link:
+        st.session_state[markdown_key] += f"\n\n$\\hfill$ ![]({meme_link}) $\\hfill$ "
+    st.session_state[f"meme_result_{submission_id}"] = bool(meme_link)
 
 
 def render_meme_section(submission_id: int, markdown_key: str):
     st.subheader("Memes")
-    left_col_meme, right_col_meme = st.columns((7, 3), vertical_alignment="bottom")
-    meme_link = left_col_meme.text_input("Bild-Link eingeben", key=f"meme_link_{submission_id}")
-    if right_col_meme.button("Add Meme", key=f"add_meme_btn_{submission_id}"):
-        if meme_link:
-            current_md = st.session_state[markdown_key]
-            st.session_state[f"pending_markdown_{submission_id}"] = (
-                current_md + f"\n\n$\\hfill$ ![]({meme_link}) $\\hfill$ "
-            )
-            st.success("Meme hinzugefügt!")
-            st.rerun()
-        else:
-            st.error("Bitte einen Link eingeben.")
+    with st.form(f"meme_form_{submission_id}", border=False):
+        left_col_meme, right_col_meme = st.columns((7, 3), vertical_alignment="bottom")
+        left_col_meme.text_input("Bild-Link eingeben", key=f"meme_link_{submission_id}")
+        right_col_meme.form_submit_button(
+            "Add Meme",
+            key=f"add_meme_btn_{submission_id}",
+            on_click=_add_meme,
+            args=(submission_id, markdown_key),
+        )
+
+    added = st.session_state.pop(f"meme_result_{submission_id}", None)
+    if added:
+        st.success("Meme hinzugefügt!")
+    elif added is False:
+        st.error("Bitte einen Link eingeben.")
 
 
 
@@ -221,8 +258,7 @@ current_root = handle_root_selection()
 maybe_rescan_current_root(current_root)
 sheet_context = resolve_sheet_context(current_root, get_sheet_id_by_name)
 
-raw_submissions = get_submissions()
-submissions = convert_submissions(raw_submissions)
+submissions = get_submission_records()
 
 if not submissions and st.session_state.archive_loaded:
     st.warning("Keine Submissions gefunden. Bitte Archive überprüfen.")
@@ -249,20 +285,19 @@ filtered_submissions = filter_submissions(submissions, selected_exercise)
 filtered_submissions = filter_by_search(filtered_submissions, search_query)
 filtered_submissions = sort_submissions(filtered_submissions, sort_mode)
 
-filtered_rows = [
-    (
-        record.id,
-        record.path,
-        record.group_name,
-        record.submitter,
-        record.exercise_code,
-        record.status,
-    )
-    for record in filtered_submissions
-]
-
+# navigate_submissions consumes the rows once, so a generator avoids an extra list of tuples
 submission_ids_ordered, id_to_label_map, label_to_id_map = navigate_submissions(
-    filtered_rows,
+    (
+        (
+            record.id,
+            record.path,
+            record.group_name,
+            record.submitter,
+            record.exercise_code,
+            record.status,
+        )
+        for record in filtered_submissions
+    ),
     exercise_filter=None,
 )
 
@@ -321,6 +356,20 @@ submission_labels = list(id_to_label_map.values())
 current_label = id_to_label_map.get(current_id, submission_labels[0])
 current_index_in_labels = submission_labels.index(current_label)
 
+# Every option is sent to the browser on each rerun, so large cohorts only get a window around the
+# current submission; the sidebar search narrows the list further.
+if len(submission_labels) > MAX_SELECTBOX_OPTIONS:
+    window_start = min(
+        max(current_index_in_labels - MAX_SELECTBOX_OPTIONS // 2, 0),
+        len(submission_labels) - MAX_SELECTBOX_OPTIONS,
+    )
+    submission_labels = submission_labels[window_start : window_start + MAX_SELECTBOX_OPTIONS]
+    current_index_in_labels -= window_start
+    st.sidebar.caption(
+        f"Zeige {MAX_SELECTBOX_OPTIONS} von {len(id_to_label_map)} Abgaben. "
+        "Nutze die Suche, um die Liste einzugrenzen."
+    )
+
 selectbox_key = (
     f"submission_select_{st.session_state.current_root}_"
     f"{st.session_state.exercise_filter}_{current_id}"
@@ -355,19 +404,15 @@ if submission_record is None:
     st.error("Für diesen Filter stehen keine Abgaben zur Verfügung.")
     st.stop()
 
-show_meme = st.session_state.get("show_meme_menu", True)
-
 submission_id = submission_record.id
 submission_path = submission_record.path
-group_name = submission_record.group_name
 submitter_name = submission_record.submitter
 current_exercise_name = submission_record.exercise_code
 points_key = f"points_input_{submission_id}"
 markdown_key = f"markdown_area_new_{submission_id}"
-status_key = f"status_select_{submission_id}"
 
 feedback = get_feedback(submission_id)
-max_points_default = float(st.session_state.exercise_max_points.get(current_exercise_name, 0.0))
+max_points_default = float(fetch_exercise_max_points(sheet_context).get(current_exercise_name, 0.0))
 initial_points = float(feedback[0]) if feedback else max_points_default
 initial_points = max(0.0, initial_points)
 initial_markdown = (feedback[1] or "") if feedback else ""
@@ -386,47 +431,28 @@ if pending_markdown_key in st.session_state:
     st.session_state[markdown_key] = st.session_state[pending_markdown_key]
     del st.session_state[pending_markdown_key]
 
-max_points_for_exercise = st.session_state.exercise_max_points.get(current_exercise_name)
-
-left_col, right_col = st.columns([7, 3], gap="medium")
-
-with left_col:
-    st.markdown(f"### Abgabe von: {submitter_name}")
-    pdfs = find_pdfs_in_submission(submission_path)
-    displayable_pdfs, pdf_issues = classify_pdf_candidates(pdfs)
-    candidate_pdfs = [
-        pdf for pdf in displayable_pdfs if not os.path.basename(pdf).startswith("feedback_")
-    ]
 
-    if candidate_pdfs:
-        for pdf in candidate_pdfs:
-            pdf_viewer(
-                pdf,
-                resolution_boost=2,
-                width="100%",
-                height=800,
-                render_text=True,
-                show_page_separator=False,
-                key=f"pdf_viewer_{submission_id}_{os.path.basename(pdf)}",
-            )
-    elif pdfs:
-        st.info("PDFs gefunden, konnten aber nicht geladen werden.")
-    else:
-        st.info("Keine PDFs gefunden.")
-
-    if pdf_issues:
-        issue_lines = "\n".join(f"• {Path(path).name}: {reason}" for path, reason in pdf_issues)
-        st.warning(
-            "Folgende PDFs konnten nicht angezeigt werden:\n" + issue_lines,
-            icon="⚠️",
-        )
-        for path, reason in pdf_issues:
-            logger.warning("PDF konnte nicht geladen werden (%s): %s", reason, path)
+# The feedback column reruns on its own while typing, so the PDF viewers on the left are not re-rendered
+@st.fragment
+def render_feedback_panel(
+    submission_record: SubmissionRecord,
+    sheet_context: SheetContext | None,
+    current_root: str | None,
+) -> None:
+    submission_id = submission_record.id
+    submission_path = submission_record.path
+    group_name = submission_record.group_name
+    submitter_name = submission_record.submitter
+    current_exercise_name = submission_record.exercise_code
+    points_key = f"points_input_{submission_id}"
+    markdown_key = f"markdown_area_new_{submission_id}"
+    status_key = f"status_select_{submission_id}"
+    max_points_for_exercise = fetch_exercise_max_points(sheet_context).get(current_exercise_name)
+    show_meme = st.session_state.get("show_meme_menu", True)
 
-with right_col:
     st.header("Feedback")
     if max_points_for_exercise:
-        st.caption(f"Maximale Punkte für Aufgabe {re.split("-",current_exercise_name)[1]}: {max_points_for_exercise:g}")
+        st.caption(f"Maximale Punkte für Aufgabe {current_exercise_name.partition("-")[2]}: {max_points_for_exercise:g}")
 
     points = st.number_input(
         "Punkte",
@@ -482,6 +508,9 @@ with right_col:
     if show_meme:
         render_meme_section(submission_id, markdown_key)
 
+    # Messages of a save that triggered a full rerun, shown where the button left them
+    save_notice_key = f"save_notices_{submission_id}"
+    saved = False
     if st.button(
         "Feedback PDF generieren",
         key=f"generate_feedback_{submission_id}",
@@ -489,9 +518,9 @@ with right_col:
         width="stretch"
     ):
         sheet_name = sheet_context.sheet_name if sheet_context else os.path.basename(str(current_root))
-        sheet_match = re.search(r"\d+", sheet_name)
+        sheet_match = _DIGITS_RE.search(sheet_name)
         sheet_number = sheet_match.group() if sheet_match else "unknown"
-        exercise_match = re.search(r"\d+", current_exercise_name)
+        exercise_match = _DIGITS_RE.search(current_exercise_name)
         exercise_number = exercise_match.group() if exercise_match else "unknown"
 
         output_pdf = os.path.join(submission_path, f"feedback_{group_name}.pdf")
@@ -514,11 +543,13 @@ with right_col:
                     st.session_state[markdown_key],
                     output_pdf,
                 )
+                saved = True
 
                 submission_identifier = (
                     group_name.split("_")[-1] if "_" in group_name else group_name
                 )
 
+                notices: list[tuple[str, str]] = []
                 if sheet_context:
                     try:
                         update_marks_csv(
@@ -527,20 +558,75 @@ with right_col:
                             points_to_save,
                             status_to_save,
                         )
-                        st.success(
-                            f"Feedback PDF erstellt und marks.csv aktualisiert: {output_pdf}"
+                        notices.append(
+                            ("success", f"Feedback PDF erstellt und marks.csv aktualisiert: {output_pdf}")
                         )
-                        st.info(f"✓ Punkte: {points_to_save}, Status: {status_to_save}")
+                        notices.append(("info", f"✓ Punkte: {points_to_save}, Status: {status_to_save}"))
                     except Exception as csv_error:
-                        st.warning(
+                        notices.append((
+                            "warning",
                             "PDF erstellt, aber marks.csv konnte nicht aktualisiert werden: "
-                            f"{csv_error}"
-                        )
-                        st.success(f"Feedback PDF erstellt: {output_pdf}")
+                            f"{csv_error}",
+                        ))
+                        notices.append(("success", f"Feedback PDF erstellt: {output_pdf}"))
                 else:
-                    st.success(f"Feedback PDF erstellt: {output_pdf}")
+                    notices.append(("success", f"Feedback PDF erstellt: {output_pdf}"))
+                st.session_state[save_notice_key] = notices
             else:
                 st.error("Fehler beim Erstellen der PDF.")
         except Exception as error:  # pragma: no cover - feedback for UI only
             st.exception(error)
 
+    if saved:
+        # Sidebar labels and progress metrics live outside this fragment
+        st.rerun(scope="app")
+
+    for kind, message in st.session_state.pop(save_notice_key, []):
+        getattr(st, kind)(message)
+
+left_col, right_col = st.columns([7, 3], gap="medium")
+
+with left_col:
+    st.markdown(f"### Abgabe von: {submitter_name}")
+    pdfs = find_pdfs_in_submission(submission_path)
+    displayable_pdfs, pdf_issues = classify_pdf_candidates(pdfs)
+    candidate_pdfs = [
+        pdf for pdf in displayable_pdfs if not os.path.basename(pdf).startswith("feedback_")
+    ]
+
+    if candidate_pdfs:
+        # Only one viewer is mounted at a time; each pdf.js render is expensive
+        selected_pdf = candidate_pdfs[0]
+        if len(candidate_pdfs) > 1:
+            selected_pdf = st.radio(
+                "PDF",
+                candidate_pdfs,
+                horizontal=True,
+                format_func=os.path.basename,
+                key=f"pdf_select_{submission_id}",
+            )
+        pdf_viewer(
+            selected_pdf,
+            resolution_boost=2,
+            width="100%",
+            height=800,
+            render_text=True,
+            show_page_separator=False,
+            key=f"pdf_viewer_{submission_id}_{os.path.basename(selected_pdf)}",
+        )
+    elif pdfs:
+        st.info("PDFs gefunden, konnten aber nicht geladen werden.")
+    else:
+        st.info("Keine PDFs gefunden.")
+
+    if pdf_issues:
+        issue_lines = "\n".join(f"• {Path(path).name}: {reason}" for path, reason in pdf_issues)
+        st.warning(
+            "Folgende PDFs konnten nicht angezeigt werden:\n" + issue_lines,
+            icon="⚠️",
+        )
+        for path, reason in pdf_issues:
+            logger.warning("PDF konnte nicht geladen werden (%s): %s", reason, path)
+
+with right_col:
+    render_feedback_panel(submission_record, sheet_context, current_root)
@@ -16,5 +16,7 @@ def db_module(tmp_path, monkeypatch):
     import app.db as db
 
     importlib.reload(db)
+    # Cached reads are keyed by arguments only, so drop results from earlier databases
+    db.st.cache_data.clear()
     db.init_db()
     yield db
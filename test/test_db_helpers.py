@@ -172,12 +172,63 @@ def test_grader_state_roundtrip(db_module):
     assert db_module.load_grader_state("missing") is None
 
 
+def test_grader_state_flush_persists_queued_writes(db_module):
+    db_module.save_grader_state("exercise_filter", "Exercise-1")
+    db_module.save_grader_state("exercise_filter", "Exercise-2")
+    db_module.flush_grader_state()
+
+    with _connect(db_module) as conn:
+        row = conn.execute(
+            "SELECT value FROM grader_state WHERE key = ?", ("exercise_filter",)
+        ).fetchone()
+    assert row == ("Exercise-2",)
+    assert db_module.load_grader_state("exercise_filter") == "Exercise-2"
+
+
+def test_grader_state_failed_write_keeps_pending_value(db_module):
+    # sqlite3 cannot bind a dict, so the background write fails
+    db_module.save_grader_state("broken", {"not": "bindable"})
+    db_module.flush_grader_state()
+
+    with _connect(db_module) as conn:
+        row = conn.execute("SELECT value FROM grader_state WHERE key = ?", ("broken",)).fetchone()
+    assert row is None
+    assert db_module.load_grader_state("broken") == {"not": "bindable"}
+
+
+def test_init_db_rolls_back_failed_migration(db_module, monkeypatch):
+    with _connect(db_module) as conn:
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+    monkeypatch.setattr(db_module, "_SCHEMA_SQL", db_module._SCHEMA_SQL + "\nSELECT * FROM missing_table;")
+
+    with pytest.raises(sqlite3.OperationalError):
+        db_module.init_db()
+
+    conn = db_module._get_conn()
+    assert not conn.in_transaction
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+
+
 def test_review_current_submission_defaults_on_invalid_state(db_module):
-    key = "review_current_submission_id"
-    db_module.save_grader_state(key, "not-a-number")
+    assert db_module.get_review_current_submission_id(default=42) == 42
 
+    # Legacy text values are only migrated when they hold a valid id
+    key = "review_current_submission_id"
+    with _connect(db_module) as conn:
+        conn.execute("INSERT INTO grader_state (key, value) VALUES (?, ?)", (key, "not-a-number"))
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+    db_module.init_db()
     assert db_module.get_review_current_submission_id(default=42) == 42
 
+    with _connect(db_module) as conn:
+        conn.execute("UPDATE grader_state SET value = ? WHERE key = ?", ("17", key))
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+    db_module.init_db()
+    assert db_module.get_review_current_submission_id(default=42) == 17
+
 
 def test_get_review_submission_ids_filtering(db_module):
     with _connect(db_module) as conn:
@@ -197,3 +248,144 @@ def test_get_review_submission_ids_filtering(db_module):
 def test_step_review_current_submission_errors_when_no_submissions(db_module):
     with pytest.raises(ValueError):
         db_module.step_review_current_submission(1)
+
+
+def test_transaction_rolls_back_grouped_writes(db_module):
+    with _connect(db_module) as conn:
+        sheet_id = _insert_sheet(conn)
+
+    with pytest.raises(RuntimeError):
+        with db_module.transaction():
+            db_module.add_error_code(sheet_id, "E1", "Erster Fehler", 1.0, "")
+            db_module.add_error_code(sheet_id, "E2", "Zweiter Fehler", 2.0, "")
+            raise RuntimeError("abort")
+
+    assert db_module.get_error_codes() == []
+
+    with db_module.transaction():
+        db_module.add_error_code(sheet_id, "E1", "Erster Fehler", 1.0, "")
+        db_module.add_error_code(sheet_id, "E2", "Zweiter Fehler", 2.0, "")
+
+    assert len(db_module.get_error_codes()) == 2
+
+
+def test_transaction_rolls_back_when_commit_fails(db_module):
+    with _connect(db_module) as conn:
+        sheet_id = _insert_sheet(conn)
+
+    # Deferred foreign keys are only checked at COMMIT, which then raises
+    with pytest.raises(sqlite3.IntegrityError):
+        with db_module.transaction() as conn:
+            conn.execute("PRAGMA defer_foreign_keys = ON")
+            conn.execute(
+                "INSERT INTO error_codes (sheet_id, code, description, deduction, comment) VALUES (?, ?, ?, ?, ?)",
+                (sheet_id + 1000, "E1", "Fehler", 1.0, ""),
+            )
+
+    conn = db_module._get_conn()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM error_codes").fetchone()[0] == 0
+
+
+def test_save_exercise_max_points_scoped_to_sheet(db_module):
+    with _connect(db_module) as conn:
+        first_sheet = _insert_sheet(conn, "Sheet-Blatt 1")
+        second_sheet = _insert_sheet(conn, "Sheet-Blatt 2")
+        _insert_exercise(conn, first_sheet, "Exercise-1")
+        _insert_exercise(conn, second_sheet, "Exercise-1")
+
+    db_module.save_exercise_max_points("Exercise-1", 7.5, first_sheet)
+    db_module.save_exercise_max_points("Exercise-2", 3.0, first_sheet)
+
+    with _connect(db_module) as conn:
+        rows = conn.execute(
+            "SELECT sheet_id, code, max_points FROM exercises ORDER BY sheet_id, code"
+        ).fetchall()
+    assert rows == [
+        (first_sheet, "Exercise-1", 7.5),
+        (first_sheet, "Exercise-2", 3.0),
+        (second_sheet, "Exercise-1", 0.0),
+    ]
+    assert db_module.get_exercise_max_points(first_sheet) == {"Exercise-1": 7.5, "Exercise-2": 3.0}
+    assert db_module.get_exercise_max_points(second_sheet) == {"Exercise-1": 0.0}
+
+
+def test_scan_and_insert_submissions_rescan_keeps_status(db_module, tmp_path):
+    sheet_root = tmp_path / "Sheet-Blatt 1"
+    for name in ("Gruppe A_101", "Gruppe B_102"):
+        (sheet_root / "Exercise-1" / name).mkdir(parents=True)
+
+    db_module.scan_and_insert_submissions(str(sheet_root))
+
+    with _connect(db_module) as conn:
+        conn.execute("UPDATE submissions SET status = 'FINAL_MARK' WHERE group_name = 'Gruppe A_101'")
+        conn.commit()
+
+    (sheet_root / "Exercise-1" / "Gruppe B_102").rmdir()
+    (sheet_root / "Exercise-1" / "Gruppe C_103").mkdir()
+    db_module.scan_and_insert_submissions(str(sheet_root))
+
+    with _connect(db_module) as conn:
+        rows = conn.execute(
+            "SELECT group_name, status FROM submissions ORDER BY group_name"
+        ).fetchall()
+    assert rows == [("Gruppe A_101", "FINAL_MARK"), ("Gruppe C_103", "SUBMITTED")]
+
+
+def test_get_submission_records_builds_records(db_module, tmp_path):
+    sheet_root = tmp_path / "Sheet-Blatt 1"
+    (sheet_root / "Exercise-1" / "Gruppe A_101").mkdir(parents=True)
+    db_module.scan_and_insert_submissions(str(sheet_root))
+
+    records = db_module.get_submission_records()
+    rows = db_module.get_submissions()
+
+    assert [record.id for record in records] == [row[0] for row in rows]
+    assert records[0].exercise_code == rows[0][4]
+    assert records[0].submitter_lc == (rows[0][3] or "").lower()
+
+
+def test_get_submission_exercise_codes_and_filtered_rows(db_module, tmp_path):
+    sheet_root = tmp_path / "Sheet-Blatt 1"
+    (sheet_root / "Exercise-1" / "Gruppe A_101").mkdir(parents=True)
+    (sheet_root / "Exercise-2" / "Gruppe B_102").mkdir(parents=True)
+    (sheet_root / "Exercise-3").mkdir(parents=True)
+    db_module.scan_and_insert_submissions(str(sheet_root))
+
+    assert db_module.get_submission_exercise_codes() == ["Exercise-1", "Exercise-2"]
+    rows = db_module.get_submissions("Exercise-2")
+    assert [row[2] for row in rows] == ["Gruppe B_102"]
+
+
+def test_feedback_submission_ids_refresh_after_save(db_module, tmp_path):
+    sheet_root = tmp_path / "Sheet-Blatt 1"
+    (sheet_root / "Exercise-1" / "Gruppe A_101").mkdir(parents=True)
+    db_module.scan_and_insert_submissions(str(sheet_root))
+    submission_id = db_module.get_submissions()[0][0]
+
+    assert db_module.get_feedback_submission_ids() == set()
+    db_module.save_feedback_with_submission(submission_id, "FINAL_MARK", 5.0, "ok", None)
+    assert db_module.get_feedback_submission_ids() == {submission_id}
+
+
+def test_rescan_keeps_existing_feedback(db_module, tmp_path):
+    sheet_root = tmp_path / "Sheet-Blatt 1"
+    exercise_dir = sheet_root / "Exercise-1"
+    for name in ("Gruppe A_101", "Gruppe B_102"):
+        (exercise_dir / name).mkdir(parents=True)
+    db_module.scan_and_insert_submissions(str(sheet_root))
+    ids = {row[2]: row[0] for row in db_module.get_submissions()}
+
+    db_module.save_feedback_with_submission(ids["Gruppe A_101"], "FINAL_MARK", 4.0, "A", None)
+    db_module.save_feedback_with_submission(ids["Gruppe B_102"], "FINAL_MARK", 3.0, "B", None)
+
+    # A renamed folder takes its grading along; a vanished graded folder is kept
+    (exercise_dir / "Gruppe A_101").rename(exercise_dir / "Team A_101")
+    (exercise_dir / "Gruppe B_102").rmdir()
+    db_module.scan_and_insert_submissions(str(sheet_root))
+
+    rows = {row[2]: row for row in db_module.get_submissions()}
+    assert set(rows) == {"Team A_101", "Gruppe B_102"}
+    assert rows["Team A_101"][5] == "FINAL_MARK"
+    assert db_module.get_feedback(rows["Team A_101"][0]) == (4.0, "A")
+    assert db_module.get_feedback(ids["Gruppe B_102"]) == (3.0, "B")
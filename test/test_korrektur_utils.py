@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from pathlib import Path
+import os
 
 import pytest
 
@@ -71,10 +71,10 @@ def test_filter_submissions_selects_specific_exercise():
     filtered = filter_submissions(submissions, "Exercise-2")
     assert [record.exercise_code for record in filtered] == ["Exercise-2"]
 
-    # "Alle" should return identical list but as a new list instance
+    # "Alle" hands a list input back without copying it
     all_records = filter_submissions(submissions, "Alle")
-    assert all_records == submissions
-    assert all_records is not submissions
+    assert all_records is submissions
+    assert filter_submissions(iter(submissions), "Alle") == submissions
 
 
 def test_classify_pdf_candidates_filters_invalid_paths(tmp_path):
@@ -101,14 +101,14 @@ def test_classify_pdf_candidates_reports_unreadable_file(tmp_path, monkeypatch):
     target_pdf = tmp_path / "locked.pdf"
     target_pdf.write_bytes(b"%PDF-1.4\n")
 
-    original_open = Path.open
+    original_open = os.open
 
-    def fake_open(self, mode="r", *args, **kwargs):
-        if self == target_pdf and "b" in mode:
+    def fake_open(path, flags, *args, **kwargs):
+        if os.fspath(path) == str(target_pdf):
             raise OSError("permission denied")
-        return original_open(self, mode, *args, **kwargs)
+        return original_open(path, flags, *args, **kwargs)
 
-    monkeypatch.setattr(Path, "open", fake_open)
+    monkeypatch.setattr(os, "open", fake_open)
 
     valid, issues = classify_pdf_candidates([str(target_pdf)])
 